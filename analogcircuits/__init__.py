@@ -1,6 +1,26 @@
-from . import amplifiers
-from .amplifiers import *
-from . import elements
-from .elements import *
-from . import filters
-from .filters import *
\ No newline at end of file
+# Sub-packages and their functions load on first attribute access, so
+# `import analogcircuits` stays cheap (no matplotlib, pandas)
+import importlib
+
+__version__ = '0.1'
+_submodules = ['amplifiers', 'elements', 'filters']
+
+def __getattr__(name):
+    if name == '__all__': # `from analogcircuits import *` loads everything
+        return [name for submodule in _submodules
+                for name in importlib.import_module(f".{submodule}", __name__).__all__]
+    if name in _submodules:
+        return importlib.import_module(f".{name}", __name__)
+    for submodule in _submodules:
+        module = importlib.import_module(f".{submodule}", __name__)
+        if name in module.__all__:
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    names = list(globals()) + _submodules
+    for submodule in _submodules:
+        names += importlib.import_module(f".{submodule}", __name__).__all__
+    return sorted(set(names))
@@ -0,0 +1,32 @@
+from . import opamp_noise
+from .opamp_noise import *
+from . import noise_models
+from .noise_models import *
+from . import design_sweep
+from .design_sweep import *
+from . import selection
+from .selection import *
+__all__ = ['convert_catalog', 'load_catalog', 'open_catalog', 'catalog_units', 'part_index', 
+           'resistor_vnoise', 'resistor_inoise', 'opamp_Rs_op', 'total_source_noise', 'rank_opamps', 
+           'opamp_noise_density', 'noise_gain_response', 'rc_filter_response', 'integrate_psd', 
+           'integrated_noise_rms', 'noise_gain', 'noise_bandwidth', 'total_input_noise_rms', 'noise_budget', 'noise_budget_dtype', 'noise_sweep',
+           'fit_noise_models', 'model_density', 'model_noise_rms', 'constraint_mask', 'pareto_front',
+           'build_rank_table', 'query_rank']
+# __all__ = amplifiers.__all__.copy()
+
+# Loaded on first use, so `python -m analogcircuits.amplifiers.catalog` (or
+# .server) doesn't find itself already imported, and asyncio stays unloaded
+import importlib
+_lazy_submodules = {'catalog': ['convert_catalog', 'load_catalog', 'open_catalog', 'catalog_units', 'part_index',
+                                'default_store_dir', 'read_export', 'split_unit', 'unit_scales', 'si_prefixes',
+                                'manifest_name'],
+                    'server': ['build_rank_table', 'query_rank', 'handle_query', 'serve']}
+
+def __getattr__(name):
+    for submodule, names in _lazy_submodules.items():
+        if name == submodule or name in names:
+            module = importlib.import_module(f".{submodule}", __name__)
+            value = module if name == submodule else getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+""" Operational Amplifier Catalog Store
+
+    Converts parametric search exports (e.g. Analog Devices CSVs) once into
+    a directory of typed .npy columns, which later loads memory-map instead
+    of parsing.  Numeric fields are float64 in SI units, text fields are
+    interned as integer codes into a sorted table of unique strings.
+
+    Run in analogcircuits: python3 -m analogcircuits.amplifiers.catalog file.csv
+"""
+import csv
+import json
+import os
+import re
+import numpy as np
+
+manifest_name = "manifest.json"
+
+# unit: (scale to SI, SI unit)
+unit_scales = {
+    'V/us': (1e6, 'V/s'),
+    'mV': (1e-3, 'V'),
+    'uV': (1e-6, 'V'),
+    'nV/rtHz': (1e-9, 'V/rtHz'),
+    'pA/rtHz': (1e-12, 'A/rtHz'),
+    'fA/rtHz': (1e-15, 'A/rtHz'),
+    'mA': (1e-3, 'A'),
+    'uA': (1e-6, 'A'),
+    'MHz': (1e6, 'Hz'),
+    'kHz': (1e3, 'Hz'),
+    'mm²': (1e-6, 'm²'),
+}
+
+def split_unit(header):
+    """ Splits a column header into name and unit, e.g. 'GBP (typ) Hz'.
+
+    Args:
+        header: column header from the export
+
+    Returns:
+        name: header without the unit
+        unit: unit string, '' if none
+    """
+    match = re.match(r"^(.*\))\s+(\S.*)$", header.strip())
+    if match:
+        return match.group(1), match.group(2)
+    return header.strip(), ''
+
+def read_export(csv_path):
+    """ Reads a parametric search CSV, handling an optional units row.
+
+    Args:
+        csv_path: path to the CSV export
+
+    Returns:
+        names: column names without units
+        units: unit per column, '' if none
+        rows: list of data rows (lists of str)
+    """
+    with open(csv_path, newline='', encoding='utf-8-sig') as csv_file:
+        rows = list(csv.reader(csv_file))
+    header, rows = rows[0], [row for row in rows[1:] if any(row)]
+    names, units = zip(*(split_unit(column) for column in header))
+    names, units = list(names), list(units)
+    if rows and not rows[0][0].strip(): # units row under the header, no part number
+        units = [unit.strip() or units[i] for i, unit in enumerate(rows[0])]
+        rows = rows[1:]
+    return names, units, rows
+
+# SI prefix: scale, as written by the Web Display export, e.g. '50f', '60µ'
+si_prefixes = {'a': 1e-18, 'f': 1e-15, 'p': 1e-12, 'n': 1e-9, 'u': 1e-6, 'µ': 1e-6, 'μ': 1e-6,
+               'm': 1e-3, '': 1, 'k': 1e3, 'M': 1e6, 'G': 1e9}
+_number = re.compile(r"^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(%s)$"
+                     % "|".join(prefix for prefix in si_prefixes if prefix))
+
+def _parse_floats(values):
+    "Helper, returns float64 array or None if any non-empty value isn't numeric (with an optional SI prefix)."
+    parsed = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        value = value.strip()
+        if value:
+            try:
+                parsed[i] = float(value)
+            except ValueError:
+                match = _number.match(value)
+                if not match:
+                    return None
+                parsed[i] = float(match.group(1)) * si_prefixes[match.group(2)]
+    return parsed
+
+def convert_catalog(csv_path, store_dir):
+    """ Converts a CSV export into a columnar .npy store.
+
+    Args:
+        csv_path: path to the CSV export
+        store_dir: directory to write, created if missing
+
+    Returns:
+        store_dir: the written directory
+    """
+    names, units, rows = read_export(csv_path)
+    os.makedirs(store_dir, exist_ok=True)
+    columns = {}
+    for i, (name, unit) in enumerate(zip(names, units)):
+        values = [row[i] if i < len(row) else '' for row in rows]
+        file_name = "col_%02d.npy" % i
+        parsed = _parse_floats(values)
+        if parsed is not None:
+            scale, unit = unit_scales.get(unit, (1, unit))
+            np.save(os.path.join(store_dir, file_name), parsed * scale)
+            columns[name] = {"file": file_name, "unit": unit, "kind": "float"}
+        else:
+            table, codes = np.unique(np.array([value.strip() for value in values]), return_inverse=True)
+            table_name = "col_%02d_table.npy" % i
+            np.save(os.path.join(store_dir, file_name), codes.astype(np.int32))
+            np.save(os.path.join(store_dir, table_name), table)
+            columns[name] = {"file": file_name, "table": table_name, "unit": unit, "kind": "text"}
+    manifest = {"source": os.path.abspath(csv_path), "rows": len(rows), "columns": columns}
+    with open(os.path.join(store_dir, manifest_name), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    return store_dir
+
+def load_catalog(store_dir, mmap=True, decode=True):
+    """ Loads a columnar store written by `convert_catalog`.
+
+    Args:
+        store_dir: directory of the store
+        mmap: memory-map numeric columns read-only (default True), so
+              worker processes share the pages instead of copying
+        decode: return text columns as str arrays (default True), else
+                as (codes, table) tuples
+
+    Returns:
+        catalog: dict of column name to ndarray
+    """
+    with open(os.path.join(store_dir, manifest_name)) as manifest_file:
+        manifest = json.load(manifest_file)
+    mmap_mode = 'r' if mmap else None
+    catalog = {}
+    for name, column in manifest["columns"].items():
+        values = np.load(os.path.join(store_dir, column["file"]), mmap_mode=mmap_mode)
+        if column["kind"] == "text":
+            table = np.load(os.path.join(store_dir, column["table"]))
+            values = table[values] if decode else (values, table)
+        catalog[name] = values
+    return catalog
+
+def catalog_units(store_dir):
+    """ Returns a dict of column name to SI unit for a store. """
+    with open(os.path.join(store_dir, manifest_name)) as manifest_file:
+        manifest = json.load(manifest_file)
+    return {name: column["unit"] for name, column in manifest["columns"].items()}
+
+def default_store_dir(csv_path):
+    """ Store directory next to the CSV, e.g. data.csv -> data.catalog/ """
+    return os.path.splitext(csv_path)[0] + ".catalog"
+
+def open_catalog(csv_path, store_dir=None, mmap=True):
+    """ Loads a catalog, converting the CSV first if the store is missing or stale.
+
+    Args:
+        csv_path: path to the CSV export
+        store_dir: store directory (default: next to the CSV)
+        mmap: memory-map numeric columns (default True)
+
+    Returns:
+        catalog: dict of column name to ndarray
+    """
+    store_dir = store_dir or default_store_dir(csv_path)
+    manifest_path = os.path.join(store_dir, manifest_name)
+    if (not os.path.exists(manifest_path)
+            or os.path.getmtime(manifest_path) < os.path.getmtime(csv_path)):
+        convert_catalog(csv_path, store_dir)
+    return load_catalog(store_dir, mmap=mmap)
+
+def part_index(catalog, part_numbers):
+    """ Returns row indices of part numbers, -1 where not in the catalog.
+
+    Args:
+        catalog: dict from `load_catalog`
+        part_numbers: str or array of str
+
+    Returns:
+        index: int or ndarray of row indices
+    """
+    parts = catalog['Part Number']
+    order = np.argsort(parts)
+    sorted_parts = parts[order]
+    pos = np.searchsorted(sorted_parts, part_numbers).clip(max=parts.size - 1)
+    index = np.where(sorted_parts[pos] == part_numbers, order[pos], -1)
+    return index if np.ndim(index) else int(index)
+
+if __name__ == "__main__":
+    import argparse
+    my_parser = argparse.ArgumentParser(prog='catalog', description='Convert a parametric search CSV to a .npy store')
+    my_parser.add_argument('csv_path', metavar='csv_path', type=str, help='CSV export')
+    my_parser.add_argument('store_dir', metavar='store_dir', type=str, nargs='?', default=None,
+                           help='Store directory (default: next to the CSV)')
+    args = my_parser.parse_args()
+    store_dir = convert_catalog(args.csv_path, args.store_dir or default_store_dir(args.csv_path))
+    print(f"Saved {store_dir}")
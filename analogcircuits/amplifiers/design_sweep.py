@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+""" Opamp Gain Stage Design Sweep
+
+    Evaluates noise, gain, bandwidth and SNR over the full grid of feedback
+    resistors x gain resistors x opamps x output RC filters.  The grid is
+    split into chunks of (Rf, Rg) pairs for a process pool; workers write
+    straight into cubes memory-mapped from one shared file (in /dev/shm
+    where there is one), so no results are pickled back or copied.
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from analogcircuits.amplifiers.opamp_noise import (noise_gain, noise_bandwidth,
+                                                   total_input_noise_rms)
+from analogcircuits.constants import room_temp
+from analogcircuits.profiling import instrument
+
+cube_names = ('noise', 'gain', 'bandwidth', 'snr')
+
+_worker = {}
+
+def _evaluate(feedback_res, g_res, axes, signal_rms, inverting, temp):
+    """ Helper, evaluates the cubes for (pairs,) Rf/Rg against all opamps and
+    filters.  Returns arrays of shape (pairs, opamps, filters).
+    """
+    opamp_vnoise, opamp_inoise, opamp_GBW, filter_res, filter_cap = axes
+    feedback_res = feedback_res[:, np.newaxis, np.newaxis]
+    g_res = g_res[:, np.newaxis, np.newaxis]
+    opamp_vnoise, opamp_inoise, opamp_GBW = (value[:, np.newaxis] for value in
+                                             (opamp_vnoise, opamp_inoise, opamp_GBW))
+    gain_of_noise = noise_gain(feedback_res, g_res)
+    gain = feedback_res / g_res if inverting else gain_of_noise
+    noise = total_input_noise_rms(opamp_vnoise, opamp_inoise, feedback_res, g_res,
+                                  opamp_GBW, filter_res, filter_cap, temp) * gain_of_noise
+    bandwidth = noise_bandwidth(opamp_GBW, gain_of_noise, filter_res, filter_cap, filter_order=1)
+    snr = 20 * np.log10(signal_rms * gain / noise)
+    shape = np.broadcast_shapes(noise.shape, bandwidth.shape)
+    return [np.broadcast_to(cube, shape) for cube in (noise, gain, bandwidth, snr)]
+
+def _attach(path, shape, dtype, feedback_res, g_res, axes, signal_rms, inverting, temp):
+    "Helper, pool initializer: maps the shared cubes into this worker."
+    cubes = np.memmap(path, dtype=dtype, mode='r+', shape=(len(cube_names),) + shape)
+    _worker.update(cubes=cubes.reshape(len(cube_names), -1, *shape[2:]),
+                   feedback_res=feedback_res, g_res=g_res, axes=axes,
+                   signal_rms=signal_rms, inverting=inverting, temp=temp)
+
+def _run_chunk(start, stop):
+    "Helper, fills flattened (Rf, Rg) pairs start:stop of the shared cubes."
+    n_g = _worker['g_res'].size
+    pairs = np.arange(start, stop)
+    results = _evaluate(_worker['feedback_res'][pairs // n_g], _worker['g_res'][pairs % n_g],
+                        _worker['axes'], _worker['signal_rms'], _worker['inverting'], _worker['temp'])
+    for cube, result in zip(_worker['cubes'], results):
+        cube[start:stop] = result
+    return stop - start
+
+@instrument('noise')
+def noise_sweep(feedback_res, g_res, opamp_vnoise, opamp_inoise, opamp_GBW,
+                filter_res=(np.nan,), filter_cap=(np.nan,), signal_rms=1.0, inverting=False,
+                workers=None, chunk_size=None, dtype=np.float64, temp=room_temp):
+    """ Sweeps opamp gain stages over every combination of the grid axes.
+
+    Output noise uses the brick-wall noise bandwidth of
+    `total_input_noise_rms` times the noise gain.
+
+    Args:
+        feedback_res: feedback resistors in Ohms, shape (Rf,)
+        g_res: gain resistors in Ohms, shape (Rg,)
+        opamp_vnoise: opamp voltage noise in V/sqrt(Hz), shape (opamps,)
+        opamp_inoise: opamp current noise in A/sqrt(Hz), shape (opamps,)
+        opamp_GBW: opamp gain bandwidth in Hz, shape (opamps,)
+        filter_res: output RC filter resistors in Ohms, shape (filters,),
+                    nan for no filter (default: one option, no filter)
+        filter_cap: output RC filter capacitors in F, shape (filters,)
+        signal_rms: input signal in Vrms for the SNR (default 1)
+        inverting: gain is Rf/Rg (True) or 1 + Rf/Rg (default False)
+        workers: processes (default os.cpu_count(), 1 runs in this process)
+        chunk_size: (Rf, Rg) pairs per task (default ~1M grid points per task)
+        dtype: result dtype (default float64, float32 halves memory)
+        temp: resistor temperature in K (default 293.15), one value per sweep
+
+    Returns:
+        cubes: dict of 'noise' (output Vrms), 'gain' (V/V), 'bandwidth'
+               (-3 dB, Hz) and 'snr' (dB), each shape (Rf, Rg, opamps, filters).
+               With workers they are views of the shared mapping, whose file
+               is already unlinked; the memory goes with the last view.
+    """
+    feedback_res, g_res = np.atleast_1d(feedback_res).astype(float), np.atleast_1d(g_res).astype(float)
+    axes = tuple(np.atleast_1d(value).astype(float) for value in
+                 (opamp_vnoise, opamp_inoise, opamp_GBW, filter_res, filter_cap))
+    shape = (feedback_res.size, g_res.size, axes[0].size, axes[3].size)
+    n_pairs = shape[0] * shape[1]
+    chunk_size = chunk_size or max(1, 2**20 // (shape[2] * shape[3]))
+    workers = workers or os.cpu_count()
+
+    if workers == 1 or n_pairs * shape[2] * shape[3] == 0:
+        cubes = np.empty((len(cube_names),) + shape, dtype=dtype)
+        flat = cubes.reshape(len(cube_names), n_pairs, *shape[2:])
+        for start in range(0, n_pairs, chunk_size):
+            pairs = np.arange(start, min(start + chunk_size, n_pairs))
+            results = _evaluate(feedback_res[pairs // shape[1]], g_res[pairs % shape[1]],
+                                axes, signal_rms, inverting, temp)
+            for cube, result in zip(flat, results):
+                cube[pairs[0]:pairs[-1] + 1] = result
+        return dict(zip(cube_names, cubes))
+
+    fd, path = tempfile.mkstemp(prefix='analogcircuits-sweep-', suffix='.cubes',
+                                dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    os.close(fd)
+    try:
+        cubes = np.memmap(path, dtype=dtype, mode='w+', shape=(len(cube_names),) + shape)
+        initargs = (path, shape, dtype, feedback_res, g_res, axes, signal_rms, inverting, temp)
+        starts = range(0, n_pairs, chunk_size)
+        stops = [min(start + chunk_size, n_pairs) for start in starts]
+        with ProcessPoolExecutor(workers, initializer=_attach, initargs=initargs) as pool:
+            list(pool.map(_run_chunk, starts, stops))
+    finally:
+        os.unlink(path) # the mapping outlives the name
+    return dict(zip(cube_names, cubes))
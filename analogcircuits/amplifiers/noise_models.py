@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+""" Operational Amplifier Noise Models
+
+    Fits e_n(f) and i_n(f) of every catalog part as a white floor with a
+    1/f corner, e_n(f) = e_white * sqrt(1 + f_corner / f), from the
+    datasheet columns, and evaluates or integrates the models for all
+    parts at once.
+"""
+import numpy as np
+from analogcircuits.amplifiers.opamp_noise import opamp_noise_density
+from analogcircuits.profiling import instrument
+
+spot_freq = 1e3 # Hz, the density columns are specified at 1 kHz
+peak_to_peak = 6.6 # Vp-p / Vrms of the 0.1 to 10 Hz noise (99.9 % of samples)
+
+def _corner_from_spot(density_low, density_spot, freq_low=1.0):
+    """ Helper, 1/f corner from densities at freq_low and at spot_freq.
+
+    Solves (e_low / e_spot)^2 = (1 + fc / f_low) / (1 + fc / f_spot).
+    """
+    ratio = (density_low / density_spot)**2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corner = freq_low * (ratio - 1) / (1 - ratio * freq_low / spot_freq)
+    return corner
+
+def _corner_from_band(noise_pp, density_spot, freq_start=0.1, freq_stop=10.0):
+    """ Helper, 1/f corner from peak-to-peak noise over a band and the spot density.
+
+    Solves (Vpp / 6.6)^2 / e_spot^2 = ((f2 - f1) + fc ln(f2 / f1)) / (1 + fc / f_spot).
+    """
+    ratio = (noise_pp / peak_to_peak / density_spot)**2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corner = (ratio - (freq_stop - freq_start)) / (np.log(freq_stop / freq_start) - ratio / spot_freq)
+    return corner
+
+def _fit(density_spot, corner_candidates):
+    """ Helper, white floor and corner from the spot density and corner estimates.
+
+    The first finite, non-negative candidate wins; parts without one are white.
+    """
+    corner = np.zeros(np.shape(density_spot))
+    found = np.zeros(np.shape(density_spot), dtype=bool)
+    for candidate in corner_candidates:
+        usable = ~found & np.isfinite(candidate) & (candidate >= 0)
+        corner[usable] = candidate[usable]
+        found |= usable
+    white = density_spot / np.sqrt(1 + corner / spot_freq)
+    return white, corner
+
+@instrument('noise')
+def fit_noise_models(catalog, vnoise_column='VNoise Density (typ)', inoise_column='Current Noise Density (typ)',
+                     vnoise_1hz_column='1 Hz Vnoise (typ)', vnoise_band_column='0.1 to 10 Hz VNoise (typ)',
+                     inoise_1hz_column='1 Hz Inoise (typ)'):
+    """ Fits white floor and 1/f corner of e_n and i_n for every part.
+
+    The voltage corner comes from the 1 Hz density, else from the 0.1 to
+    10 Hz peak-to-peak noise; the current corner from the 1 Hz density.
+    Parts without either are white (corner 0); parts without a 1 kHz
+    density are nan.
+
+    Args:
+        catalog: dict of columns, e.g. from `load_catalog`
+        vnoise_column: e_n at 1 kHz in V/sqrt(Hz)
+        inoise_column: i_n at 1 kHz in A/sqrt(Hz)
+        vnoise_1hz_column: e_n at 1 Hz in V/sqrt(Hz)
+        vnoise_band_column: 0.1 to 10 Hz noise in Vp-p
+        inoise_1hz_column: i_n at 1 Hz in A/sqrt(Hz)
+
+    Returns:
+        model: dict of 'vnoise_white' (V/sqrt(Hz)), 'vnoise_corner' (Hz),
+            'inoise_white' (A/sqrt(Hz)) and 'inoise_corner' (Hz), shape (parts,)
+    """
+    vnoise = np.asarray(catalog[vnoise_column], dtype=float)
+    inoise = np.asarray(catalog[inoise_column], dtype=float)
+    vnoise_white, vnoise_corner = _fit(vnoise, [
+        _corner_from_spot(np.asarray(catalog[vnoise_1hz_column], dtype=float), vnoise),
+        _corner_from_band(np.asarray(catalog[vnoise_band_column], dtype=float), vnoise)])
+    inoise_white, inoise_corner = _fit(inoise, [
+        _corner_from_spot(np.asarray(catalog[inoise_1hz_column], dtype=float), inoise)])
+    return {'vnoise_white': vnoise_white, 'vnoise_corner': vnoise_corner,
+            'inoise_white': inoise_white, 'inoise_corner': inoise_corner}
+
+@instrument('noise')
+def model_density(model, freqs, kind='v'):
+    """ Evaluates e_n(f) or i_n(f) of every part at freqs in one broadcast.
+
+    Args:
+        model: dict from `fit_noise_models`
+        freqs: frequencies in Hz, shape (frequencies,)
+        kind: 'v' for e_n in V/sqrt(Hz), 'i' for i_n in A/sqrt(Hz)
+
+    Returns:
+        density: noise density, shape (parts, frequencies)
+    """
+    white = np.asarray(model[f'{kind}noise_white'])[..., np.newaxis]
+    corner = np.asarray(model[f'{kind}noise_corner'])[..., np.newaxis]
+    return opamp_noise_density(np.asarray(freqs), white, corner)
+
+@instrument('noise')
+def model_noise_rms(model, freq_start=0.1, freq_stop=10e6, kind='v'):
+    """ Integrated e_n (or i_n) of every part over a band, in closed form.
+
+    Integral of e_white^2 (1 + fc / f) df = e_white^2 ((f2 - f1) + fc ln(f2 / f1)),
+    so the whole catalog costs one array expression, no frequency grid.
+
+    Args:
+        model: dict from `fit_noise_models`
+        freq_start: lowest frequency in Hz (default 0.1)
+        freq_stop: highest frequency in Hz (default 10 MHz)
+        kind: 'v' for Vrms, 'i' for Arms
+
+    Returns:
+        noise: rms noise, shape (parts,) broadcast with the band limits
+    """
+    white = np.asarray(model[f'{kind}noise_white'])
+    corner = np.asarray(model[f'{kind}noise_corner'])
+    power = white**2 * ((freq_stop - freq_start) + corner * np.log(np.divide(freq_stop, freq_start)))
+    return np.sqrt(power)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+""" Operational Amplifier Noise
+
+    Resistor and opamp noise helpers, vectorized over source resistances
+    and whole opamp catalogs.  Based on Analog Devices AN-940.
+"""
+import numpy as np
+from analogcircuits.constants import boltzmann, room_temp
+from analogcircuits.elements import parallel_res
+from analogcircuits.profiling import instrument
+
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz # np.trapz before NumPy 2.0
+
+def resistor_vnoise(res, bandwidth=1, temp=room_temp):
+    """ Calculates Johnson-Nyquist noise (thermal noise) of resistors.
+    Default temp is room temp, 20 C; temperature arrays broadcast against
+    res, e.g. shape (temps, 1) against (designs,) for a (temps, designs) table.
+
+    Args:
+        res: resistor value in Ohms
+        bandwidth: bandwidth in Hz (default 1)
+        temp: temperature in K (default 293.15), see `celsius_to_kelvin`
+
+    Returns:
+        vnoise: voltage noise of resistor in V/sqrt(Hz)
+    """
+    vnoise = np.sqrt(4 * boltzmann * temp * bandwidth * res)
+    return vnoise
+
+def resistor_inoise(res, bandwidth=1, temp=room_temp):
+    """ Calculates the Johnson-Nyquist current noise of resistor.
+    Default temp is room temp, 20 C, arrays broadcast as `resistor_vnoise`.
+
+    Args:
+        res: resistor in Ohms
+        bandwidth: bandwidth in Hz
+        temp: temperature in K (default 293.15)
+
+    Returns:
+        inoise: current noise in A/sqrt(Hz)
+    """
+    inoise = np.sqrt((4 * boltzmann * temp * bandwidth) / res)
+    return inoise
+
+def opamp_Rs_op(vnoise_opamp, inoise_opamp):
+    """ Opamp equvilant resistance based on its voltage and current noise.
+    Helper function.  Based on Analog Devices AN-940.
+
+    Args:
+        vnoise_opamp: opamp's voltage noise in V/sqrt(Hz), usually at 1 kHz
+        inoise_opamp: opamp's current noise in A/sqrt(Hz), usually at 1 kHz
+
+    Return:
+        Rs_op: resistance in Ohms, based on vnoise/inoise of opamp
+    """
+    Rs_op = vnoise_opamp / inoise_opamp
+    return Rs_op
+
+@instrument('noise')
+def total_source_noise(source_res, vnoise_opamp, inoise_opamp, bandwidth=1, temp=room_temp):
+    """ Total input referred noise of opamps driven from source resistances.
+    Adds opamp voltage noise, current noise into the source and the source's
+    Johnson noise in quadrature.
+
+    Args:
+        source_res: source resistances in Ohms, shape (Rs,)
+        vnoise_opamp: opamp voltage noise in V/sqrt(Hz), shape (opamps,)
+        inoise_opamp: opamp current noise in A/sqrt(Hz), shape (opamps,)
+        bandwidth: bandwidth in Hz (default 1)
+        temp: source temperature in K (default 293.15), e.g. shape (temps, 1, 1)
+
+    Returns:
+        noise: noise in V/sqrt(Hz) (Vrms if bandwidth given), shape (Rs, opamps),
+               (temps, Rs, opamps) with a temperature array
+    """
+    source_res = np.asarray(source_res, dtype=float)[..., np.newaxis]
+    vnoise_opamp = np.asarray(vnoise_opamp, dtype=float)
+    inoise_opamp = np.asarray(inoise_opamp, dtype=float)
+    noise = np.sqrt((vnoise_opamp**2 + (inoise_opamp * source_res)**2) * bandwidth
+                    + resistor_vnoise(source_res, bandwidth, temp)**2)
+    return noise
+
+@instrument('noise')
+def rank_opamps(source_res, catalog, k=10, vnoise_column='VNoise Density (typ)',
+                inoise_column='Current Noise Density (typ)', temp=room_temp):
+    """ Lowest total input noise opamps for each source resistance.
+    Opamps missing voltage or current noise in the catalog are ranked last.
+
+    Args:
+        source_res: source resistances in Ohms, shape (Rs,)
+        catalog: dict of columns, e.g. from `load_catalog`
+        k: number of opamps to return per source resistance (default 10)
+        vnoise_column: catalog column of voltage noise in V/sqrt(Hz)
+        inoise_column: catalog column of current noise in A/sqrt(Hz)
+        temp: source temperature in K (default 293.15), broadcasts as in
+              `total_source_noise`
+
+    Returns:
+        index: catalog row indices, best first, shape (Rs, k)
+        noise: total input noise in V/sqrt(Hz) of those rows, shape (Rs, k)
+    """
+    noise = total_source_noise(np.atleast_1d(source_res), catalog[vnoise_column], catalog[inoise_column],
+                               temp=temp)
+    noise[np.isnan(noise)] = np.inf
+    k = min(k, noise.shape[-1])
+    if k < noise.shape[-1]:
+        index = np.argpartition(noise, k - 1, axis=-1)[..., :k]
+    else:
+        index = np.broadcast_to(np.arange(k), noise.shape)
+    top_noise = np.take_along_axis(noise, index, axis=-1)
+    order = np.argsort(top_noise, axis=-1)
+    index = np.take_along_axis(index, order, axis=-1)
+    noise = np.take_along_axis(top_noise, order, axis=-1)
+    return index, noise
+
+def opamp_noise_density(freqs, noise_white, freq_corner=0):
+    """ Opamp voltage (or current) noise density with a 1/f corner.
+    e_n(f) = e_white * sqrt(1 + f_corner / f)
+
+    Args:
+        freqs: frequencies in Hz, shape (frequencies,)
+        noise_white: white noise floor in V/sqrt(Hz) (A/sqrt(Hz)), shape (designs, 1)
+        freq_corner: 1/f noise corner in Hz, broadcasts like noise_white
+
+    Returns:
+        density: noise density, shape (designs, frequencies)
+    """
+    density = noise_white * np.sqrt(1 + freq_corner / freqs)
+    return density
+
+def noise_gain_response(freqs, feedback_res, g_res, opamp_GBW):
+    """ Magnitude of the noise gain, 1 + Rf/Rg rolled off by a single pole
+    opamp at GBW / noise gain.
+
+    Args:
+        freqs: frequencies in Hz, shape (frequencies,)
+        feedback_res: feedback resistor in Ohms, shape (designs, 1)
+        g_res: gain resistor in Ohms, broadcasts like feedback_res
+        opamp_GBW: opamp gain bandwidth in Hz, broadcasts like feedback_res
+
+    Returns:
+        gain: noise gain in V/V, shape (designs, frequencies)
+    """
+    dc_gain = 1 + feedback_res / g_res
+    gain = dc_gain / np.sqrt(1 + (freqs * dc_gain / opamp_GBW)**2)
+    return gain
+
+def rc_filter_response(freqs, filter_res, filter_cap):
+    """ Magnitude of a first order RC low-pass, 1 where no filter (nan) is given.
+
+    Args:
+        freqs: frequencies in Hz, shape (frequencies,)
+        filter_res: filter resistor in Ohms, shape (designs, 1)
+        filter_cap: filter capacitor in F, broadcasts like filter_res
+
+    Returns:
+        gain: filter gain in V/V, shape (designs, frequencies)
+    """
+    rc_freq = 1 / (2 * np.pi * filter_res * filter_cap)
+    gain = 1 / np.sqrt(1 + (freqs / rc_freq)**2)
+    return np.where(np.isnan(gain), 1.0, gain)
+
+@instrument('integrate')
+def integrate_psd(freqs, psd):
+    """ Integrates a power spectral density over a log spaced grid.
+    Uses the trapezoid rule in ln(f), int S(f) df = int S(f) f d(ln f),
+    which stays accurate with a few points per decade.
+
+    Args:
+        freqs: frequencies in Hz, shape (frequencies,)
+        psd: power spectral density in V^2/Hz, shape (..., frequencies)
+
+    Returns:
+        power: integrated power in V^2, shape (...)
+    """
+    power = _trapezoid(psd * freqs, np.log(freqs), axis=-1)
+    return power
+
+@instrument('noise')
+def integrated_noise_rms(opamp_input_voltage_noise, opamp_input_current_noise, 
+                         feedback_res, g_res, opamp_GBW, voltage_noise_corner=0, 
+                         current_noise_corner=0, filter_res=np.nan, filter_cap=np.nan, 
+                         freq_start=0.1, freq_stop=None, points_per_decade=50, temp=room_temp):
+    """ Total output noise in Vrms from the full noise spectral density.
+    Opamp e_n (with 1/f corner), i_n * (Rf || Rg) and the resistors' Johnson
+    noise add in quadrature, are shaped by the noise gain and the output RC
+    filter, then integrated numerically.  Every argument is an array over
+    designs (or a scalar); all designs share one frequency grid.  Divide by
+    the noise gain 1 + Rf/Rg for the input referred noise.
+
+    Args:
+        opamp_input_voltage_noise: white voltage noise in V/sqrt(Hz)
+        opamp_input_current_noise: white current noise in A/sqrt(Hz)
+        feedback_res: feedback resistor in Ohms
+        g_res: gain resistor in Ohms
+        opamp_GBW: gain bandwidth in Hz
+        voltage_noise_corner: 1/f corner of e_n in Hz (default 0, none)
+        current_noise_corner: 1/f corner of i_n in Hz (default 0, none)
+        filter_res: output RC filter resistor in Ohms (default nan, none)
+        filter_cap: output RC filter capacitor in F (default nan, none)
+        freq_start: lowest frequency in Hz (default 0.1)
+        freq_stop: highest frequency in Hz (default 100 * the largest finite
+                   GBW; needed when every GBW is infinite, an ideal opamp)
+        points_per_decade: grid density (default 50)
+        temp: resistor temperature in K (default 293.15)
+
+    Returns:
+        output_noise: total output noise in Vrms, shape (designs,)
+    """
+    args = np.broadcast_arrays(*(np.asarray(arg, dtype=float) for arg in 
+                                 (opamp_input_voltage_noise, opamp_input_current_noise, 
+                                  feedback_res, g_res, opamp_GBW, voltage_noise_corner, 
+                                  current_noise_corner, filter_res, filter_cap, temp)))
+    (vnoise, inoise, feedback_res, g_res, opamp_GBW, voltage_noise_corner, 
+     current_noise_corner, filter_res, filter_cap, temp) = (arg[..., np.newaxis] for arg in args)
+    if freq_stop is None:
+        finite_GBW = opamp_GBW[np.isfinite(opamp_GBW)]
+        if not finite_GBW.size:
+            raise ValueError("freq_stop is needed when no opamp_GBW is finite")
+        freq_stop = 100 * np.max(finite_GBW)
+    if not (np.isfinite(freq_stop) and 0 < freq_start < freq_stop):
+        raise ValueError("Need 0 < freq_start < freq_stop, both finite.")
+    num = int(np.ceil(points_per_decade * np.log10(freq_stop / freq_start))) + 1
+    freqs = np.geomspace(freq_start, freq_stop, num=num)
+
+    req = parallel_res(feedback_res, g_res)
+    input_psd = (opamp_noise_density(freqs, vnoise, voltage_noise_corner)**2 
+                 + (req * opamp_noise_density(freqs, inoise, current_noise_corner))**2 
+                 + resistor_vnoise(req, temp=temp)**2) # V^2/Hz
+    shaping = (noise_gain_response(freqs, feedback_res, g_res, opamp_GBW) 
+               * rc_filter_response(freqs, filter_res, filter_cap))**2
+    output_noise = np.sqrt(integrate_psd(freqs, input_psd * shaping))
+    return output_noise
+
+def noise_gain(feedback_res, res_g):
+    "Noise gain, 1 + Rf/Rg regardless of opamp config."
+    gain_of_noise = 1 + feedback_res / res_g # ALWAYS! Regardless of opamp config
+    return gain_of_noise
+
+def noise_bandwidth(opamp_GBW, noise_gain, filter_res=np.nan, filter_cap=np.nan, filter_order=1.57):
+    """ Equivalent noise bandwidth in Hz, brick-wall approximation.
+    The lower of the closed-loop bandwidth GBW / noise gain and the RC filter
+    corner, times filter_order (1.57 for a single pole).  nan filter values
+    mean no filter.
+
+    Args:
+        opamp_GBW: gain bandwidth in Hz
+        noise_gain: noise gain in V/V
+        filter_res: RC filter resistor in Ohms (default nan, none)
+        filter_cap: RC filter capacitor in F (default nan, none)
+        filter_order: noise bandwidth factor (default 1.57)
+
+    Returns:
+        bandwidth: noise bandwidth in Hz
+    """
+    closed_loop_freq = opamp_GBW / noise_gain # Hz
+    rc_freq = 1 / (2 * np.pi * filter_res * filter_cap) # Hz
+    bandwidth = filter_order * np.fmin(closed_loop_freq, rc_freq)
+    return bandwidth
+
+@instrument('noise')
+def total_input_noise_rms(opamp_input_voltage_noise, opamp_input_current_noise, 
+                          feedback_res, g_res, opamp_GBW, filter_res=np.nan, filter_cap=np.nan,
+                          temp=room_temp):
+    """ Total input voltage noise in Vrms, brick-wall noise bandwidth.
+    Vectorized, every argument broadcasts; nan filter values mean no filter.
+
+    Args:
+        opamp_input_voltage_noise: opamp voltage noise in V/sqrt(Hz)
+        opamp_input_current_noise: opamp current noise in A/sqrt(Hz)
+        feedback_res: feedback resistor in Ohms
+        g_res: gain resistor in Ohms
+        opamp_GBW: gain bandwidth in Hz
+        filter_res: RC filter resistor in Ohms (default nan, none)
+        filter_cap: RC filter capacitor in F (default nan, none)
+        temp: resistor temperature in K (default 293.15)
+
+    Returns:
+        total_input_voltage_noise: input referred noise in Vrms
+    """
+    req = parallel_res(feedback_res, g_res)
+    bandwidth = noise_bandwidth(opamp_GBW, noise_gain(feedback_res, g_res), filter_res, filter_cap)
+    total_input_voltage_noise = np.sqrt((opamp_input_voltage_noise**2 
+                                         + (opamp_input_current_noise * req)**2 
+                                         + resistor_vnoise(req, temp=temp)**2) * bandwidth) # Vrms
+    return total_input_voltage_noise
+
+noise_budget_dtype = np.dtype([
+    ('signal_gain', 'f8'), ('noise_gain', 'f8'), ('bandwidth', 'f8'), ('req', 'f8'),
+    ('vnoise_density', 'f8'), ('inoise_density', 'f8'), ('resistor_density', 'f8'),
+    ('vnoise_rms', 'f8'), ('inoise_rms', 'f8'), ('resistor_rms', 'f8'),
+    ('input_rms', 'f8'), ('output_rms', 'f8'),
+    ('resistor_dominant', '?'), ('inoise_dominant', '?'), ('flicker_dominant', '?'),
+])
+
+@instrument('noise')
+def noise_budget(opamp_input_voltage_noise, opamp_input_current_noise, feedback_res, g_res, opamp_GBW,
+                 voltage_noise_corner=0, filter_res=np.nan, filter_cap=np.nan, inverting=False,
+                 freq_start=0.1, temp=room_temp):
+    """ Noise budget of opamp gain stages, every contributor and the total.
+    Brick-wall noise bandwidth as `total_input_noise_rms`; the opamp's 1/f
+    noise adds e_n^2 f_corner ln(bandwidth / freq_start).  Vectorized, every
+    argument broadcasts, no printing; a million designs take one call.
+
+    Dominance follows AN-940's factor of 3 in density: the resistor (or
+    current) noise dominates when 3x it exceeds the opamp voltage noise.
+    1/f noise dominates when 10x the corner exceeds the noise bandwidth.
+
+    Args:
+        opamp_input_voltage_noise: opamp white voltage noise in V/sqrt(Hz)
+        opamp_input_current_noise: opamp current noise in A/sqrt(Hz)
+        feedback_res: feedback resistor in Ohms
+        g_res: gain resistor in Ohms
+        opamp_GBW: gain bandwidth in Hz
+        voltage_noise_corner: 1/f corner of e_n in Hz (default 0, none)
+        filter_res: RC filter resistor in Ohms (default nan, none)
+        filter_cap: RC filter capacitor in F (default nan, none)
+        inverting: inverting stage, signal gain Rf/Rg (default False, 1 + Rf/Rg)
+        freq_start: lower band limit in Hz for the 1/f noise (default 0.1)
+        temp: resistor temperature in K (default 293.15), e.g. shape
+              (temps, 1) against (designs,) for a (temps, designs) budget
+
+    Returns:
+        budget: structured array of `noise_budget_dtype`, broadcast shape of
+            the arguments.  Densities are input referred in V/sqrt(Hz), rms
+            values in Vrms; output_rms is input_rms times the noise gain.
+    """
+    args = np.broadcast_arrays(*(np.asarray(arg, dtype=float) for arg in 
+                                 (opamp_input_voltage_noise, opamp_input_current_noise, feedback_res,
+                                  g_res, opamp_GBW, voltage_noise_corner, filter_res, filter_cap, temp)))
+    vnoise, inoise, feedback_res, g_res, opamp_GBW, corner, filter_res, filter_cap, temp = args
+    inverting = np.broadcast_to(inverting, vnoise.shape)
+    budget = np.empty(vnoise.shape, dtype=noise_budget_dtype)
+    budget['noise_gain'] = noise_gain(feedback_res, g_res)
+    budget['signal_gain'] = np.where(inverting, feedback_res / g_res, budget['noise_gain'])
+    budget['bandwidth'] = noise_bandwidth(opamp_GBW, budget['noise_gain'], filter_res, filter_cap)
+    budget['req'] = parallel_res(feedback_res, g_res)
+    budget['vnoise_density'] = vnoise
+    budget['inoise_density'] = inoise * budget['req']
+    budget['resistor_density'] = resistor_vnoise(budget['req'], temp=temp)
+    flicker = corner * np.log(np.maximum(budget['bandwidth'] / freq_start, 1))
+    budget['vnoise_rms'] = vnoise * np.sqrt(budget['bandwidth'] + flicker)
+    budget['inoise_rms'] = budget['inoise_density'] * np.sqrt(budget['bandwidth'])
+    budget['resistor_rms'] = budget['resistor_density'] * np.sqrt(budget['bandwidth'])
+    budget['input_rms'] = np.sqrt(budget['vnoise_rms']**2 + budget['inoise_rms']**2 
+                                  + budget['resistor_rms']**2)
+    budget['output_rms'] = budget['input_rms'] * budget['noise_gain']
+    budget['resistor_dominant'] = 3 * budget['resistor_density'] > vnoise
+    budget['inoise_dominant'] = 3 * budget['inoise_density'] > vnoise
+    budget['flicker_dominant'] = 10 * corner > budget['bandwidth']
+    return budget
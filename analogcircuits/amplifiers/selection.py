@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+""" Operational Amplifier Selection
+
+    Pareto front (skyline) of catalog parts over several objectives, after
+    hard constraints such as supply span and channel count.
+"""
+from bisect import bisect_left, bisect_right
+import numpy as np
+from analogcircuits.profiling import instrument
+
+objective_senses = {
+    'VNoise Density (typ)': 'min',
+    'Current Noise Density (typ)': 'min',
+    'Iq/Amp (typ)': 'min',
+    'GBP (typ)': 'max',
+    'Slew Rate (typ)': 'max',
+    'Vos (max)': 'min',
+}
+default_objectives = ('VNoise Density (typ)', 'Current Noise Density (typ)', 'Iq/Amp (typ)')
+
+def constraint_mask(catalog, supply=None, channels=None, limits=None):
+    """ Parts meeting hard constraints.
+
+    Args:
+        catalog: dict of columns, e.g. from `load_catalog`
+        supply: supply span in V the part must accept, within
+            'Vs span (min)' and 'Vs span (max)' (default: any)
+        channels: '# of Amps', an int or a sequence of allowed counts (default: any)
+        limits: dict of column to (min, max), nan values fail (default none)
+
+    Returns:
+        mask: bool array, shape (parts,)
+    """
+    mask = np.ones(len(catalog['Part Number']), dtype=bool)
+    if supply is not None:
+        mask &= (catalog['Vs span (min)'] <= supply) & (supply <= catalog['Vs span (max)'])
+    if channels is not None:
+        mask &= np.isin(catalog['# of Amps'], np.atleast_1d(channels))
+    for column, (low, high) in (limits or {}).items():
+        mask &= (catalog[column] >= low) & (catalog[column] <= high)
+    return mask
+
+def _front_2d(points):
+    "Helper, non-dominated mask of unique points (n, 2) sorted lexicographically."
+    best = np.minimum.accumulate(points[:, 1])
+    front = np.ones(len(points), dtype=bool)
+    front[1:] = points[1:, 1] < best[:-1]
+    return front
+
+def _front_3d(points):
+    "Helper, non-dominated mask of unique points (n, 3) sorted lexicographically."
+    front = np.zeros(len(points), dtype=bool)
+    stair_x, stair_y = [], [] # 2-D front of (x1, x2) so far, x1 ascending, x2 descending
+    for i, (_, x, y) in enumerate(points.tolist()):
+        pos = bisect_right(stair_x, x)
+        if pos and stair_y[pos - 1] <= y: # an earlier point is no worse in all three
+            continue
+        front[i] = True
+        start, end = bisect_left(stair_x, x), pos
+        while end < len(stair_x) and stair_y[end] >= y: # now dominated in (x1, x2)
+            end += 1
+        stair_x[start:end] = [x]
+        stair_y[start:end] = [y]
+    return front
+
+def _front_blocks(points, block_size=1024):
+    "Helper, non-dominated mask of unique points (n, d), block-vectorized."
+    order = np.argsort(points.sum(axis=1), kind='stable') # dominators have a smaller sum
+    front = np.zeros(len(points), dtype=bool)
+    kept = np.empty((0, points.shape[1]))
+    for start in range(0, len(order), block_size):
+        block = order[start:start + block_size]
+        candidates = np.concatenate((kept, points[block]))
+        no_worse = np.all(candidates[np.newaxis] <= points[block][:, np.newaxis], axis=-1)
+        better = np.any(candidates[np.newaxis] < points[block][:, np.newaxis], axis=-1)
+        on_front = ~np.any(no_worse & better, axis=-1)
+        front[block[on_front]] = True
+        kept = np.concatenate((kept, points[block[on_front]]))
+    return front
+
+@instrument('selection')
+def pareto_front(catalog, objectives=default_objectives, senses=None, mask=None):
+    """ Catalog rows on the Pareto front of the objectives.
+
+    A part is on the front when no other part is at least as good in every
+    objective and better in one.  Two or three objectives use O(n log n)
+    sweeps, more use a block-vectorized dominance check against the front
+    found so far.  Parts missing any objective are left out.
+
+    Args:
+        catalog: dict of columns, e.g. from `load_catalog`
+        objectives: column names (default voltage noise, current noise and Iq)
+        senses: 'min' or 'max' per objective (default from `objective_senses`)
+        mask: bool array of parts to consider, e.g. from `constraint_mask`
+
+    Returns:
+        index: catalog row indices on the front, ascending
+    """
+    senses = senses or [objective_senses.get(column, 'min') for column in objectives]
+    values = np.column_stack([np.asarray(catalog[column], dtype=float) * (-1 if sense == 'max' else 1)
+                              for column, sense in zip(objectives, senses)])
+    usable = np.all(np.isfinite(values), axis=1)
+    if mask is not None:
+        usable &= mask
+    rows = np.flatnonzero(usable)
+    points, inverse = np.unique(values[rows], axis=0, return_inverse=True) # sorted lexicographically
+    match points.shape[1]:
+        case 1:
+            front = points[:, 0] == points[0, 0] if len(points) else np.zeros(0, dtype=bool)
+        case 2:
+            front = _front_2d(points)
+        case 3:
+            front = _front_3d(points)
+        case _:
+            front = _front_blocks(points)
+    return rows[front[inverse.ravel()]]
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+""" Operational Amplifier Catalog Query Server
+
+    Loads a catalog once and answers "lowest noise opamps for a source
+    resistance" queries over a Unix socket or localhost TCP, one JSON object
+    per line each way.  Concurrent clients share one asyncio loop.
+
+    Total input noise^2 = vn^2 + in^2 Rs^2 + 4kT Rs, and the Johnson term is
+    the same for every part, so the ranking only changes where two lines
+    vn^2 + in^2 u (u = Rs^2) cross.  The rank table holds the top parts for
+    each interval between those crossings, and a query is a binary search
+    over the interval edges.
+
+    Run: analogcircuits-catalog-server file.csv --socket /tmp/opamps.sock
+    Query: {"id": 1, "rs": 10e3, "k": 5}
+"""
+import asyncio
+import json
+import os
+import socket
+import stat
+import numpy as np
+from analogcircuits.amplifiers.catalog import open_catalog
+from analogcircuits.amplifiers.opamp_noise import total_source_noise
+
+def _dominated_counts(vn2, in2, block_size=1024):
+    "Helper, number of parts no worse in both noise terms and better in one, per part."
+    counts = np.empty(vn2.size, dtype=np.int64)
+    for start in range(0, vn2.size, block_size):
+        v, i = vn2[start:start + block_size, np.newaxis], in2[start:start + block_size, np.newaxis]
+        no_worse = (vn2 <= v) & (in2 <= i)
+        counts[start:start + block_size] = np.sum(no_worse & ((vn2 < v) | (in2 < i)), axis=-1)
+    return counts
+
+def build_rank_table(catalog, max_k=20, vnoise_column='VNoise Density (typ)',
+                     inoise_column='Current Noise Density (typ)'):
+    """ Precomputes the noise ranking of a catalog over all source resistances.
+
+    Parts beaten everywhere by max_k others never make a top list and are
+    dropped first, so the crossings are only taken between the remaining
+    candidates.  Parts missing voltage or current noise are left out.
+
+    Args:
+        catalog: dict of columns, e.g. from `open_catalog`
+        max_k: longest ranking a query may ask for (default 20)
+        vnoise_column: catalog column of voltage noise in V/sqrt(Hz)
+        inoise_column: catalog column of current noise in A/sqrt(Hz)
+
+    Returns:
+        table: dict of 'edges' (source resistances in Ohms where the
+               ranking changes, shape (intervals - 1,)), 'ranking' (catalog
+               row indices, best first, shape (intervals, max_k)), and the
+               catalog's 'parts', 'vnoise' and 'inoise'
+    """
+    vnoise = np.asarray(catalog[vnoise_column], dtype=float)
+    inoise = np.asarray(catalog[inoise_column], dtype=float)
+    rows = np.flatnonzero(np.isfinite(vnoise) & np.isfinite(inoise))
+    vn2, in2 = vnoise[rows]**2, inoise[rows]**2
+    keep = _dominated_counts(vn2, in2) < max_k
+    rows, vn2, in2 = rows[keep], vn2[keep], in2[keep]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossings = (vn2 - vn2[:, np.newaxis]) / (in2[:, np.newaxis] - in2)
+    crossings = np.unique(crossings[np.isfinite(crossings) & (crossings > 0)])
+    # one point inside every interval between crossings, in u = Rs^2
+    if crossings.size:
+        points = np.concatenate(([crossings[0] / 2], np.sqrt(crossings[:-1] * crossings[1:]),
+                                 [crossings[-1] * 2]))
+    else:
+        points = np.ones(1)
+    noise2 = vn2 + in2 * points[:, np.newaxis]
+    order = np.argsort(noise2, axis=-1, kind='stable')[:, :max_k]
+    ranking = rows[order]
+    changed = np.ones(len(ranking), dtype=bool)
+    changed[1:] = np.any(ranking[1:] != ranking[:-1], axis=-1)
+    return {'edges': np.sqrt(crossings[changed[1:]]), 'ranking': ranking[changed],
+            'parts': catalog['Part Number'], 'vnoise': vnoise, 'inoise': inoise}
+
+def query_rank(table, source_res, k=10):
+    """ Lowest total input noise opamps for a source resistance.
+
+    Same result as `rank_opamps` for parts with both noise figures, from a
+    binary search over the precomputed rank table.
+
+    Args:
+        table: dict from `build_rank_table`
+        source_res: source resistance in Ohms
+        k: number of opamps, at most the table's max_k (default 10)
+
+    Returns:
+        index: catalog row indices, best first, shape (k,)
+        noise: total input noise in V/sqrt(Hz) of those rows, shape (k,)
+    """
+    if not 0 < k <= table['ranking'].shape[-1]:
+        raise ValueError(f"k must be between 1 and {table['ranking'].shape[-1]}")
+    index = table['ranking'][np.searchsorted(table['edges'], source_res, side='right'), :k]
+    noise = total_source_noise(source_res, table['vnoise'][index], table['inoise'][index])
+    return index, noise
+
+def _whole_number(value, name):
+    "Helper, a JSON number without a fractional part as an int."
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not float(value).is_integer():
+        raise ValueError(f"{name} must be a whole number")
+    return int(value)
+
+def handle_query(table, request):
+    """ Answers one decoded JSON request.
+
+    Args:
+        table: dict from `build_rank_table`
+        request: dict with 'rs' (Ohms), optional 'k' (default 10) and 'id'
+                 (a string or finite number) echoed back
+
+    Returns:
+        response: dict with 'rs', 'parts' and 'noise' (V/sqrt(Hz)), or
+                  'error' with a message
+    """
+    request_id = request.get('id')
+    if isinstance(request_id, bool) or not isinstance(request_id, (str, int, float, type(None))) \
+            or (isinstance(request_id, float) and not np.isfinite(request_id)):
+        return {'error': "ValueError: id must be a string or a finite number"}
+    response = {'id': request_id} if 'id' in request else {}
+    try:
+        source_res = float(request['rs'])
+        if not (np.isfinite(source_res) and source_res >= 0):
+            raise ValueError("rs must be a finite, non-negative number of Ohms")
+        with np.errstate(over='ignore'): # reported below
+            index, noise = query_rank(table, source_res, _whole_number(request.get('k', 10), 'k'))
+        if not np.all(np.isfinite(noise)):
+            raise ValueError("rs is too large, the noise overflows")
+    except (KeyError, TypeError, ValueError, OverflowError) as error:
+        response['error'] = f"{type(error).__name__}: {error}"
+        return response
+    response.update(rs=source_res, parts=table['parts'][index].tolist(), noise=noise.tolist())
+    return response
+
+async def _client(table, reader, writer):
+    "Helper, serves one connection until the client closes it."
+    try:
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = handle_query(table, request) if isinstance(request, dict) else \
+                    {'error': "request must be a JSON object"}
+            except json.JSONDecodeError as error:
+                response = {'error': f"JSONDecodeError: {error}"}
+            try:
+                encoded = json.dumps(response, allow_nan=False)
+            except ValueError as error: # nan or inf that slipped through
+                encoded = json.dumps({'error': f"ValueError: {error}"})
+            writer.write(encoded.encode() + b'\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+def _listening(socket_path):
+    "Helper, True when a server accepts connections on the Unix socket."
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError: # refused, a stale socket
+            return False
+    return True
+
+async def serve(table, socket_path=None, host='127.0.0.1', port=8765):
+    """ Serves rank queries until cancelled.
+
+    Args:
+        table: dict from `build_rank_table`
+        socket_path: Unix socket to listen on, replacing a stale one; a
+                     socket another server listens on, or any other file,
+                     raises FileExistsError (default None, listen on
+                     host:port instead)
+        host: TCP host (default localhost only)
+        port: TCP port (default 8765)
+    """
+    handler = lambda reader, writer: _client(table, reader, writer)
+    if socket_path:
+        if os.path.lexists(socket_path):
+            if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+                raise FileExistsError(f"{socket_path} exists and is not a socket")
+            if _listening(socket_path):
+                raise FileExistsError(f"{socket_path} is in use by a running server")
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(handler, path=socket_path)
+    else:
+        server = await asyncio.start_server(handler, host=host, port=port)
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    "Console entry point, see the module docstring."
+    import argparse
+    my_parser = argparse.ArgumentParser(prog='analogcircuits-catalog-server',
+                                        description='Serve opamp noise rankings from a catalog.')
+    my_parser.add_argument('csv_path', type=str, help='Parametric search CSV export')
+    my_parser.add_argument('--store-dir', type=str, default=None, help='Catalog store (next to the CSV)')
+    my_parser.add_argument('--socket', type=str, default=None, help='Unix socket path (TCP if not given)')
+    my_parser.add_argument('--host', type=str, default='127.0.0.1', help='TCP host (127.0.0.1)')
+    my_parser.add_argument('--port', type=int, default=8765, help='TCP port (8765)')
+    my_parser.add_argument('--max-k', type=int, default=20, help='Longest ranking served (20)')
+    args = my_parser.parse_args(argv)
+    table = build_rank_table(open_catalog(args.csv_path, args.store_dir), args.max_k)
+    print(f"{len(table['edges']) + 1} ranking intervals, listening on {args.socket or f'{args.host}:{args.port}'}",
+          flush=True)
+    try:
+        asyncio.run(serve(table, args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# Persistent, content-addressed result cache of .npy files
+
+import functools
+from collections import OrderedDict
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import types
+import uuid
+import warnings
+import numpy as np
+
+try:
+    import fcntl
+except ImportError: # not POSIX, eviction runs unlocked
+    fcntl = None
+
+default_cache_dir = os.environ.get('ANALOGCIRCUITS_CACHE_DIR',
+                                   os.path.join(os.path.expanduser("~"), ".cache", "analogcircuits"))
+default_max_bytes = int(os.environ.get('ANALOGCIRCUITS_CACHE_MAX_BYTES', 2**30)) # 1 GiB
+cache_enabled = os.environ.get('ANALOGCIRCUITS_CACHE', '1') != '0'
+cache_schema = 2 # bump when the stored layout or key scheme changes
+
+def _warn(message):
+    "Helper, warns at the first caller outside analogcircuits, however many decorators wrap the cached function."
+    package = os.path.dirname(os.path.abspath(__file__))
+    frame, level = sys._getframe(1), 2
+    while frame is not None and frame.f_code.co_filename.startswith(package):
+        frame, level = frame.f_back, level + 1
+    warnings.warn(message, RuntimeWarning, stacklevel=level)
+
+def _feed(hasher, value):
+    "Helper, feeds a value into the hash, arrays by dtype, shape and bytes."
+    if isinstance(value, np.ndarray):
+        hasher.update(f"ndarray{value.dtype.str}{value.shape}".encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _feed(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(f"dict{len(value)}".encode())
+        for key in sorted(value):
+            _feed(hasher, key)
+            _feed(hasher, value[key])
+    else:
+        hasher.update(f"{type(value).__name__}:{value!r}".encode())
+
+def _feed_code(hasher, code):
+    "Helper, feeds bytecode, constants and nested code (lambdas, comprehensions)."
+    hasher.update(code.co_code)
+    _feed(hasher, [const for const in code.co_consts if not hasattr(const, 'co_code')])
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            _feed_code(hasher, const)
+
+def _global_names(code):
+    "Helper, names a code object and its nested code look up."
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            names |= _global_names(const)
+    return names
+
+@functools.lru_cache(maxsize=None)
+def code_digest(func):
+    """
+    Returns a digest of a function's bytecode and of every analogcircuits
+    function it calls, directly or through other analogcircuits functions,
+    so editing a callee invalidates cached results too.
+    """
+    hasher = hashlib.sha256()
+    pending, seen = [func], set()
+    while pending:
+        current = inspect.unwrap(pending.pop())
+        code = getattr(current, '__code__', None)
+        if code is None or current in seen:
+            continue
+        seen.add(current)
+        hasher.update(f"{current.__module__}.{current.__qualname__}".encode())
+        _feed_code(hasher, code)
+        namespace = getattr(current, '__globals__', {})
+        for name in sorted(_global_names(code)):
+            value = namespace.get(name)
+            if isinstance(value, types.ModuleType): # e.g. passive.rc_response
+                value = [getattr(value, attr, None) for attr in sorted(_global_names(code))]
+            for callee in value if isinstance(value, list) else [value]:
+                if (callable(callee) and str(getattr(callee, '__module__', '')).startswith('analogcircuits')
+                        and callee is not current):
+                    pending.append(callee)
+    return hasher.hexdigest()
+
+def cache_key(func, args=(), kwargs=None):
+    """
+    Returns the hex key of a call: the function's name, its bytecode and
+    that of the analogcircuits functions it calls, its arguments, the
+    library version and the cache schema.
+
+    Parameters
+    ----------
+    func : function
+        The cached function.
+
+    args : tuple
+        Positional arguments.
+
+    kwargs : dict, optional
+        Keyword arguments.
+
+    Returns
+    -------
+    key : str
+        SHA-256 hex digest.
+
+    """
+    from analogcircuits import __version__
+    hasher = hashlib.sha256()
+    hasher.update(f"{func.__module__}.{func.__qualname__}:{__version__}:{cache_schema}".encode())
+    hasher.update(code_digest(func).encode())
+    _feed(hasher, tuple(args))
+    _feed(hasher, kwargs or {})
+    return hasher.hexdigest()
+
+def cache_get(key, cache_dir=None, mmap=True):
+    """
+    Returns a cached result, or None on a miss.
+
+    Arrays come back memory-mapped read-only unless mmap is False.  A hit
+    refreshes the entry's time for LRU eviction.  A truncated or corrupt
+    entry is removed and counts as a miss.
+
+    Parameters
+    ----------
+    key : str
+        Key from `cache_key`.
+
+    cache_dir : str, optional
+        Cache directory (default ANALOGCIRCUITS_CACHE_DIR or ~/.cache/analogcircuits).
+
+    mmap : bool
+        Memory-map arrays (default True).
+
+    Returns
+    -------
+    result : ndarray, scalar, tuple or None
+        The stored result.
+
+    """
+    entry = os.path.join(cache_dir or default_cache_dir, key)
+    try:
+        with open(os.path.join(entry, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+        values = []
+        for i in range(meta["count"]):
+            value = np.load(os.path.join(entry, f"{i}.npy"), mmap_mode='r' if mmap else None)
+            values.append(value.item() if value.ndim == 0 else value)
+        os.utime(entry)
+    except OSError: # missing, evicted while reading, or no usable cache directory
+        return None
+    except (ValueError, KeyError, TypeError, EOFError): # corrupt, e.g. a partial copy of the cache
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+    return tuple(values) if meta["tuple"] else values[0]
+
+def cache_put(key, result, cache_dir=None, max_bytes=None):
+    """
+    Stores a result (array, scalar or tuple of them) under key.
+
+    The entry is written to a private directory and renamed into place, so
+    concurrent processes never see partial entries; the first writer wins.
+
+    Parameters
+    ----------
+    key : str
+        Key from `cache_key`.
+
+    result : ndarray, scalar or tuple
+        Value to store.
+
+    cache_dir : str, optional
+        Cache directory.
+
+    max_bytes : int, optional
+        Size bound, least recently used entries are evicted beyond it
+        (default ANALOGCIRCUITS_CACHE_MAX_BYTES or 1 GiB).
+
+    Returns
+    -------
+    stored : bool
+        False, with a warning, when the cache directory isn't writable.
+
+    """
+    cache_dir = cache_dir or default_cache_dir
+    values = result if isinstance(result, tuple) else (result,)
+    temp = os.path.join(cache_dir, f".tmp-{key}-{uuid.uuid4().hex}")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        os.makedirs(temp)
+        for i, value in enumerate(values):
+            np.save(os.path.join(temp, f"{i}.npy"), np.asarray(value))
+        with open(os.path.join(temp, "meta.json"), 'w') as meta_file:
+            json.dump({"count": len(values), "tuple": isinstance(result, tuple)}, meta_file)
+    except OSError as error:
+        shutil.rmtree(temp, ignore_errors=True)
+        _warn(f"Result not cached in {cache_dir}: {error}")
+        return False
+    try:
+        os.rename(temp, os.path.join(cache_dir, key))
+    except OSError: # another process stored the same key first
+        shutil.rmtree(temp, ignore_errors=True)
+    try:
+        evict(cache_dir, max_bytes)
+    except OSError as error:
+        _warn(f"Cache eviction failed in {cache_dir}: {error}")
+    return True
+
+def evict(cache_dir=None, max_bytes=None):
+    """
+    Removes least recently used entries until the cache fits max_bytes.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Cache directory.
+
+    max_bytes : int, optional
+        Size bound in bytes.
+
+    """
+    cache_dir = cache_dir or default_cache_dir
+    max_bytes = default_max_bytes if max_bytes is None else max_bytes
+    with open(os.path.join(cache_dir, ".lock"), 'w') as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError: # another process is evicting
+                return
+        entries = []
+        for entry in os.scandir(cache_dir):
+            if entry.is_dir() and not entry.name.startswith('.'):
+                try:
+                    size = sum(item.stat().st_size for item in os.scandir(entry.path))
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+                except FileNotFoundError:
+                    pass
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+def clear_cache(cache_dir=None):
+    "Removes every entry of the cache directory."
+    shutil.rmtree(cache_dir or default_cache_dir, ignore_errors=True)
+
+def cached(func=None, *, cache_dir=None, max_bytes=None, mmap=True, memory_size=128):
+    """
+    Decorator, caches a function's array/scalar/tuple results on disk.
+
+    The most recent results are also kept in process, so repeated calls
+    only pay for hashing the arguments.  Disabled when ANALOGCIRCUITS_CACHE=0.
+    Results always come back as `cache_get` returns them (read-only memory
+    maps by default), fresh or not; if the cache can't be written the fresh
+    result is returned uncached, with a warning.
+    Arguments must be arrays, scalars, strings, or lists/tuples/dicts of
+    them; results must not be None.
+
+    Parameters
+    ----------
+    func : function
+        Function to wrap.
+
+    cache_dir, max_bytes, mmap
+        As for `cache_get` and `cache_put`.
+
+    memory_size : int
+        Results kept in process (default 128, 0 for none).
+
+    Returns
+    -------
+    wrapper : function
+        Cached function, the original stays available as wrapper.uncached.
+
+    """
+    if func is None:
+        return functools.partial(cached, cache_dir=cache_dir, max_bytes=max_bytes, mmap=mmap,
+                                 memory_size=memory_size)
+    memory = OrderedDict()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not cache_enabled:
+            return func(*args, **kwargs)
+        key = cache_key(func, args, kwargs)
+        if key in memory:
+            memory.move_to_end(key)
+            return memory[key]
+        result = cache_get(key, cache_dir, mmap)
+        if result is None:
+            result = func(*args, **kwargs)
+            if not cache_put(key, result, cache_dir, max_bytes):
+                return result
+            stored = cache_get(key, cache_dir, mmap) # same kind of array as a hit
+            result = result if stored is None else stored
+        if memory_size:
+            memory[key] = result
+            if len(memory) > memory_size:
+                memory.popitem(last=False)
+        return result
+    wrapper.uncached = func
+    return wrapper
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+""" Physical Constants
+
+    Shared by the noise calculations, SI units.  Temperatures are in K;
+    arrays of them broadcast like any other argument.
+"""
+import numpy as np
+
+boltzmann = 1.380649e-23 # J/K, exact since the 2019 SI
+zero_celsius = 273.15 # K
+room_temp = 293.15 # K, 20 C
+
+def celsius_to_kelvin(temp):
+    "Converts temperatures in C to K, e.g. np.linspace(-40, 125, 34)."
+    return np.asarray(temp, dtype=float) + zero_celsius
+
+def kelvin_to_celsius(temp):
+    "Converts temperatures in K to C."
+    return np.asarray(temp, dtype=float) - zero_celsius
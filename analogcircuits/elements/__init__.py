@@ -1,4 +1,7 @@
 from . import discrete
 from .discrete import *
-__all__ = ['ind_imp', 'cap_imp', 'parallel_res', 'series_res', 'voltage_divider']
+from . import eseries
+from .eseries import *
+__all__ = ['ind_imp', 'cap_imp', 'parallel_res', 'series_res', 'voltage_divider', 'divider_transfer', 'design_axis', 
+           'eseries_values', 'snap_to_eseries', 'rc_design', 'lc_design']
 # __all__ = elements.__all__.copy()
\ No newline at end of file
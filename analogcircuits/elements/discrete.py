@@ -1,79 +1,293 @@
+import math
 import numpy as np
+from analogcircuits.profiling import instrument
 
-def ind_imp(ind, freq):
-    impedance =  0 + 1j *(2 * np.pi * freq * ind)
-    return impedance
+def design_axis(values):
+    """
+    Returns component values as a column, shape (designs, 1).
+
+    Broadcasts against a frequency vector of shape (frequencies,) so
+    impedances and transfer functions come out as (designs, frequencies).
+
+    Parameters
+    ----------
+    values : array_like
+        Component values, one per design.
+    
+    Returns
+    -------
+    column : ndarray
+        Values with a trailing frequency axis of length 1.
+    
+    """
+    column = np.asarray(values)[..., np.newaxis]
+    return column
+
+def _result_dtype(dtype, *args):
+    "Helper, dtype of a result: complex when an argument is, precision from dtype."
+    kind = np.result_type(*args, 1.0) # ints promote to float
+    if dtype is None:
+        return kind
+    if kind.kind == 'c' or np.dtype(dtype).kind == 'c':
+        return np.result_type(dtype, np.complex64) # float32 -> complex64
+    return np.dtype(dtype)
+
+def _buffer(out, dtype, *args):
+    "Helper, output buffer of the broadcast shape of args unless out is given."
+    if out is None:
+        out = np.empty(np.broadcast_shapes(*(np.shape(arg) for arg in args)), dtype)
+    return out
 
-def cap_imp(cap, freq):
-    impedance = 0 + 1j * -(1 / (2 * np.pi * freq * cap))
-    return impedance
+def _scalar(out):
+    "Helper, unwraps 0-d results so scalar inputs give scalars."
+    return out[()] if out.ndim == 0 else out
 
-def parallel_res(*args):
+_python_numbers = frozenset((int, float, complex)) # plain scalars take arithmetic fast paths
+
+@instrument('impedance')
+def ind_imp(ind, freq, out=None, dtype=np.float64):
     """
-    Returns the equivalent resistance in Ohms of components in parallel.
+    Returns the complex impedance in Ohms of an inductor.
+
+    Computed in place, the only full-length array is the result.
 
     Parameters
     ----------
-    args : float
-        Resistance in Ohms.
+    ind : float or ndarray
+        Inductance in H.
+    
+    freq : float or ndarray
+        Frequency in Hz, broadcasts against ind.
+    
+    out : ndarray, optional
+        Complex buffer of the broadcast shape to write into, e.g. to reuse
+        one allocation across sweeps.
+
+    dtype : dtype
+        Precision, float64 (default, complex128 result) or float32 /
+        complex64 (complex64 result, half the memory).  Ignored with out.
+    
+    Returns
+    -------
+    impedance : complex or ndarray
+        Impedance in Ohms.
+    
+    """
+    if out is None and dtype is np.float64 and type(ind) in _python_numbers and type(freq) in _python_numbers:
+        return complex(0, 2 * math.pi * freq * ind)
+    impedance = _buffer(out, _result_dtype(dtype, 1j), ind, freq)
+    impedance.real[...] = 0
+    np.multiply(freq, 2 * np.pi * np.asarray(ind), out=impedance.imag)
+    return _scalar(impedance)
+
+@instrument('impedance')
+def cap_imp(cap, freq, out=None, dtype=np.float64):
+    """
+    Returns the complex impedance in Ohms of a capacitor.
+
+    Computed in place, the only full-length array is the result.
+
+    Parameters
+    ----------
+    cap : float or ndarray
+        Capacitance in F.
+    
+    freq : float or ndarray
+        Frequency in Hz, broadcasts against cap.
+    
+    out : ndarray, optional
+        Complex buffer of the broadcast shape to write into.
+
+    dtype : dtype
+        Precision, float64 (default) or float32 / complex64.  Ignored with out.
     
     Returns
     -------
-    parallel_res : float
-        Equivalent resistance in Ohms.
+    impedance : complex or ndarray
+        Impedance in Ohms.
     
     """
-    product = 1
-    for arg in args:
-        product *= arg
-    summed = 1
-    for arg in args:
-        summed += arg
-    parallel_res = product / summed
+    if out is None and dtype is np.float64 and type(cap) in _python_numbers and type(freq) in _python_numbers:
+        reactance = freq * (-2 * math.pi * cap)
+        return complex(0, 1 / reactance if reactance else math.copysign(math.inf, reactance))
+    impedance = _buffer(out, _result_dtype(dtype, 1j), cap, freq)
+    impedance.real[...] = 0
+    reactance = impedance.imag # view, -1 / (2 pi f C) is filled in place
+    with np.errstate(divide='ignore'):
+        np.multiply(freq, -2 * np.pi * np.asarray(cap), out=reactance)
+        np.reciprocal(reactance, out=reactance)
+    return _scalar(impedance)
 
-    return parallel_res
+def _network(args, axis, mask):
+    "Helper, elements as one float/complex array with the element axis last, and the mask."
+    if len(args) == 1:
+        elements = np.asarray(args[0])
+        elements = elements.reshape(1) if elements.ndim == 0 else np.moveaxis(elements, axis, -1)
+        if mask is not None:
+            mask = np.moveaxis(np.broadcast_to(mask, np.shape(args[0])), axis, -1)
+    else: # varargs, elementwise over their broadcast shape
+        elements = np.stack(np.broadcast_arrays(*args), axis=-1)
+        if mask is not None:
+            mask = np.stack(np.broadcast_arrays(*mask), axis=-1)
+    elements = elements.astype(np.result_type(elements, 1.0), copy=False)
+    return elements, True if mask is None else mask
 
-def series_res(*args):
+@instrument('network')
+def parallel_res(*args, axis=-1, mask=None):
     """
-    Returns the equivalent resistance in Ohms of components in series.
+    Returns the equivalent resistance (or impedance) in Ohms of components
+    in parallel, 1 / sum(1 / R).
+
+    Either pass the components as arguments, evaluated elementwise over
+    their broadcast shape, or one array of networks reduced along axis,
+    e.g. shape (networks, elements).  Ragged networks are padded with
+    np.inf (an open circuit) or masked out.  A zero element shorts its
+    network to 0; a network without elements is open (inf).
 
     Parameters
     ----------
-    args : float
-        Resistance in Ohms.
+    args : float, complex or ndarray
+        Resistances (or complex impedances) in Ohms.
+
+    axis : int
+        Element axis when a single array is given (default -1).
+
+    mask : ndarray of bool, optional
+        True for elements that are present, same shape as the array (or
+        one per argument).
     
     Returns
     -------
-    summed : float
-        Equivalent resistance in Ohms.
+    parallel_res : float, complex or ndarray
+        Equivalent resistance in Ohms, one per network.
     
     """
-    summed = 1
-    for arg in args:
-        summed += arg
+    if not args: # no elements, open
+        return math.inf
+    if mask is None and _python_numbers.issuperset(map(type, args)):
+        kind = complex if complex in map(type, args) else float
+        if 0 in args: # shorted
+            return kind(0)
+        conductance = sum([1 / arg for arg in args])
+        if not conductance: # open, 1 / 0 like np.divide
+            return complex(math.inf, math.nan) if kind is complex else math.inf
+        return kind(1 / conductance)
+    elements, mask = _network(args, axis, mask)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        conductance = np.sum(np.divide(1, elements), axis=-1, where=mask)
+        parallel_res = np.divide(1, conductance)
+    shorted = np.any(elements == 0, axis=-1, where=mask) # 1 / 0 is nan, not inf, in complex
+    parallel_res = np.where(shorted, 0, parallel_res)
+    return _scalar(parallel_res)
+
+@instrument('network')
+def series_res(*args, axis=-1, mask=None):
+    """
+    Returns the equivalent resistance (or impedance) in Ohms of components
+    in series, sum(R).
+
+    Takes components like `parallel_res`; ragged networks are padded with
+    0 (a short) or masked out.  A network without elements is a short (0).
+
+    Parameters
+    ----------
+    args : float, complex or ndarray
+        Resistances (or complex impedances) in Ohms.
+
+    axis : int
+        Element axis when a single array is given (default -1).
+
+    mask : ndarray of bool, optional
+        True for elements that are present.
+    
+    Returns
+    -------
+    summed : float, complex or ndarray
+        Equivalent resistance in Ohms, one per network.
     
-    return summed
+    """
+    if mask is None and _python_numbers.issuperset(map(type, args)): # also no elements, a short
+        return sum(args, 0.0)
+    elements, mask = _network(args, axis, mask)
+    summed = np.sum(elements, axis=-1, where=mask)
+    return _scalar(summed)
 
-def voltage_divider(voltage, res_one, res_two):
+@instrument('divider')
+def voltage_divider(voltage, res_one, res_two, out=None, dtype=None):
     """
     Returns the output voltage in V of components in a voltage divider.
 
     Parameters
     ----------
-    voltage: float
+    voltage: float or ndarray
         Input voltage in V.
     
-    res_one : float
-        Resistance in Ohms.
+    res_one : float, complex or ndarray
+        Resistance (or complex impedance) in Ohms.
     
-    res_two : float
-        Resistance in Ohms.
+    res_two : float, complex or ndarray
+        Resistance (or complex impedance) in Ohms.
+
+    out : ndarray, optional
+        Buffer of the broadcast shape to write into, may be one of the
+        inputs (e.g. the impedance array) to avoid any allocation; aliasing
+        voltage costs one temporary for the transfer function.
+
+    dtype : dtype, optional
+        Precision, float64 or float32 / complex64 (default: of the inputs).
+        Ignored with out.
     
     Returns
     -------
-    divider_volt : float
+    divider_volt : float, complex or ndarray
         Output voltage in V.
     
     """
-    divider_volt = voltage * (res_two / (res_one + res_two))
-    return divider_volt
\ No newline at end of file
+    divider_volt = _buffer(out, _result_dtype(dtype, voltage, res_one, res_two), voltage, res_one, res_two)
+    if np.shares_memory(divider_volt, voltage): # the transfer would overwrite the input voltage
+        transfer = divider_transfer(res_one, res_two, dtype=divider_volt.dtype)
+        np.multiply(voltage, transfer, out=divider_volt)
+    else:
+        divider_transfer(res_one, res_two, out=divider_volt)
+        np.multiply(divider_volt, voltage, out=divider_volt)
+    return _scalar(divider_volt)
+
+@instrument('divider')
+def divider_transfer(imped_one, imped_two, out=None, dtype=None):
+    """
+    Returns the complex transfer function Vout/Vin of a voltage divider.
+
+    All arguments broadcast, so impedances of shape (designs, frequencies)
+    are evaluated in one pass.  Lossless resonances (Z1 + Z2 = 0) give inf.
+    Evaluated in place as 1 / (1 + Z1 / Z2), so out may alias either
+    impedance and no temporaries are made.
+
+    Parameters
+    ----------
+    imped_one : complex or ndarray
+        Series (top) impedance in Ohms.
+    
+    imped_two : complex or ndarray
+        Shunt (bottom) impedance in Ohms.
+
+    out : ndarray, optional
+        Buffer of the broadcast shape to write into.
+
+    dtype : dtype, optional
+        Precision, float64 or float32 / complex64 (default: of the inputs).
+        Ignored with out.
+    
+    Returns
+    -------
+    transfer : complex or ndarray
+        Vout/Vin, keeps magnitude and phase.
+    
+    """
+    transfer = _buffer(out, _result_dtype(dtype, imped_one, imped_two), imped_one, imped_two)
+    shorted = np.equal(imped_two, 0) # before out overwrites an aliased imped_two
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        np.divide(imped_one, imped_two, out=transfer)
+        np.add(transfer, 1, out=transfer)
+        np.reciprocal(transfer, out=transfer)
+    np.copyto(transfer, 0, where=shorted) # Z1 / 0 is nan, not inf, in complex
+    return _scalar(transfer)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# E-series preferred values and inverse design of filter corners
+
+import numpy as np
+
+eseries_mantissas = {
+    'E6': (10, 15, 22, 33, 47, 68),
+    'E12': (10, 12, 15, 18, 22, 27, 33, 39, 47, 56, 68, 82),
+    'E24': (10, 11, 12, 13, 15, 16, 18, 20, 22, 24, 27, 30,
+            33, 36, 39, 43, 47, 51, 56, 62, 68, 75, 82, 91),
+    'E96': (100, 102, 105, 107, 110, 113, 115, 118, 121, 124, 127, 130,
+            133, 137, 140, 143, 147, 150, 154, 158, 162, 165, 169, 174,
+            178, 182, 187, 191, 196, 200, 205, 210, 215, 221, 226, 232,
+            237, 243, 249, 255, 261, 267, 274, 280, 287, 294, 301, 309,
+            316, 324, 332, 340, 348, 357, 365, 374, 383, 392, 402, 412,
+            422, 432, 442, 453, 464, 475, 487, 499, 511, 523, 536, 549,
+            562, 576, 590, 604, 619, 634, 649, 665, 681, 698, 715, 732,
+            750, 768, 787, 806, 825, 845, 866, 887, 909, 931, 953, 976),
+}
+eseries_mantissas['E48'] = eseries_mantissas['E96'][::2]
+
+def eseries_values(series='E24', decade_min=0, decade_max=6):
+    """
+    Returns the sorted preferred values of an E-series over decades.
+
+    Parameters
+    ----------
+    series : str
+        'E6', 'E12', 'E24', 'E48' or 'E96'.
+
+    decade_min : int
+        Exponent of the first decade, e.g. -12 for 1 pF.
+
+    decade_max : int
+        Exponent of the last decade (inclusive), e.g. 6 for 1 MOhm to 9.76 MOhm.
+
+    Returns
+    -------
+    values : ndarray
+        Preferred values, ascending.
+
+    """
+    mantissas = eseries_mantissas[series]
+    digits = len(str(mantissas[0])) - 1 # 10 -> 1.0, 100 -> 1.00
+    # parsed from text so e.g. 3.6e-09 is the closest float, not 3.6 * 1e-09
+    values = np.array([float(f"{mantissa}e{decade - digits}") 
+                       for decade in range(decade_min, decade_max + 1) for mantissa in mantissas])
+    return values
+
+def snap_to_eseries(values, series='E24'):
+    """
+    Returns the nearest (in ratio) E-series value for each value.
+
+    Parameters
+    ----------
+    values : float or ndarray
+        Component values, > 0.
+
+    series : str
+        'E6', 'E12', 'E24', 'E48' or 'E96'.
+
+    Returns
+    -------
+    snapped : float or ndarray
+        Preferred values.
+
+    """
+    values = np.asarray(values, dtype=float)
+    decade = np.floor(np.log10(values))
+    table = eseries_values(series, 0, 1) # 1.0 to 10 and beyond, covers rounding up
+    snapped = _nearest(table, values / 10**decade) * 10**decade
+    return snapped
+
+def _nearest(table, values):
+    "Helper, nearest entries of a sorted table to values, compared in log."
+    idx = np.searchsorted(table, values).clip(1, table.size - 1)
+    lower, upper = table[idx - 1], table[idx]
+    return np.where(np.abs(np.log(values / lower)) <= np.abs(np.log(upper / values)), lower, upper)
+
+def _pair_search(freq_corner, product, first_values, second_values, freq_of, impedance_of,
+                 impedance, tolerance, max_results):
+    "Helper, pairs each first value with the second value closest to product / first."
+    second = _nearest(second_values, product / first_values)
+    freq = freq_of(first_values, second)
+    error = freq / freq_corner - 1
+    keep = np.abs(error) <= tolerance
+    first, second, freq, error = first_values[keep], second[keep], freq[keep], error[keep]
+    if impedance is None:
+        order = np.argsort(np.abs(error), kind='stable')
+    else:
+        distance = np.abs(np.log10(impedance_of(first, second) / impedance))
+        order = np.lexsort((np.abs(error), distance))
+    order = order[:max_results]
+    return first[order], second[order], freq[order], error[order]
+
+def rc_design(freq_corner, tolerance=0.02, res_series='E96', cap_series='E24',
+              res_decades=(0, 6), cap_decades=(-12, -4), impedance=None, max_results=20):
+    """
+    Returns E-series R and C pairs whose RC corner hits freq_corner.
+
+    Every resistor in the table is paired with the capacitor nearest to
+    1 / (2 pi f R) via np.searchsorted, so the search is O(N log M) over
+    all N x M pairs.  Applies to `rc_filter` and `cr_filter`.
+
+    Parameters
+    ----------
+    freq_corner : float
+        Target corner frequency in Hz.
+
+    tolerance : float
+        Maximum relative corner error (default 2 %).
+
+    res_series, cap_series : str
+        E-series of the resistors (default 'E96') and capacitors ('E24').
+
+    res_decades, cap_decades : tuple of int
+        (first, last) decade exponents, default 1 Ohm to 9.76 MOhm and
+        1 pF to 910 uF.
+
+    impedance : float, optional
+        Preferred resistance in Ohms; candidates within tolerance are then
+        ranked by distance from it (in decades) before error.
+
+    max_results : int
+        Number of candidates returned (default 20).
+
+    Returns
+    -------
+    res : ndarray
+        Resistance in Ohms, best candidate first.
+
+    cap : ndarray
+        Capacitance in F.
+
+    freq : ndarray
+        Achieved corner frequency in Hz.
+
+    error : ndarray
+        Relative corner error, (freq - freq_corner) / freq_corner.
+
+    """
+    product = 1 / (2 * np.pi * freq_corner) # R * C
+    return _pair_search(freq_corner, product, eseries_values(res_series, *res_decades),
+                        eseries_values(cap_series, *cap_decades),
+                        lambda res, cap: 1 / (2 * np.pi * res * cap),
+                        lambda res, cap: res, impedance, tolerance, max_results)
+
+def lc_design(freq_corner, tolerance=0.02, ind_series='E12', cap_series='E24',
+              ind_decades=(-9, -1), cap_decades=(-12, -4), impedance=None, max_results=20):
+    """
+    Returns E-series L and C pairs whose LC corner hits freq_corner.
+
+    Like `rc_design` with L * C = 1 / (2 pi f)^2; impedance is the preferred
+    characteristic impedance sqrt(L / C) in Ohms.  Applies to `lc_filter`
+    and `cl_filter`.
+
+    Parameters
+    ----------
+    freq_corner : float
+        Target corner (resonance) frequency in Hz.
+
+    tolerance : float
+        Maximum relative corner error (default 2 %).
+
+    ind_series, cap_series : str
+        E-series of the inductors (default 'E12') and capacitors ('E24').
+
+    ind_decades, cap_decades : tuple of int
+        (first, last) decade exponents, default 1 nH to 820 mH and
+        1 pF to 910 uF.
+
+    impedance : float, optional
+        Preferred sqrt(L / C) in Ohms.
+
+    max_results : int
+        Number of candidates returned (default 20).
+
+    Returns
+    -------
+    ind : ndarray
+        Inductance in H, best candidate first.
+
+    cap : ndarray
+        Capacitance in F.
+
+    freq : ndarray
+        Achieved corner frequency in Hz.
+
+    error : ndarray
+        Relative corner error.
+
+    """
+    product = 1 / (2 * np.pi * freq_corner)**2 # L * C
+    return _pair_search(freq_corner, product, eseries_values(ind_series, *ind_decades),
+                        eseries_values(cap_series, *cap_decades),
+                        lambda ind, cap: 1 / (2 * np.pi * np.sqrt(ind * cap)),
+                        lambda ind, cap: np.sqrt(ind / cap), impedance, tolerance, max_results)
@@ -1,5 +1,39 @@
 # To get sub-modules
+from . import bode
+from .bode import *
 from . import passive
 from .passive import *
-__all__ = ['rc_filter', 'lc_filter', 'cr_filter', 'cl_filter', 'filter_signal', 'filter_bode_plotter']
-# __all__ = filters.__all__.copy()
\ No newline at end of file
+from . import ladder
+from .ladder import *
+from . import stream
+from .stream import *
+from . import sweep
+from .sweep import *
+from . import active
+from .active import *
+from . import transfer
+from .transfer import *
+from . import tolerance
+from .tolerance import *
+__all__ = ['rc_filter', 'lc_filter', 'cr_filter', 'cl_filter', 'rc_response', 'lc_response', 'cr_response', 'cl_response', 'filter_sweep', 'filter_signal', 'gain_db', 'filter_bode_plotter', 'log_sweep', 'series_abcd', 'shunt_abcd', 'cascade_abcd', 'ladder_abcd', 'rc_ladder', 'lc_ladder', 'ladder_response', 'minus_3db_freqs', 'minmax_decimate', 'render_bode', 'export_bode_plots', 
+           'analog_coeffs', 'bilinear_coeffs', 'iir_filter', 'stream_filter', 'memmap_chunks', 'filter_file',
+           'read_specs', 'filter_result', 'batch_results', 'write_results', 'run_batch',
+           'sallen_key_lowpass', 'sallen_key_highpass', 'sallen_key_bandpass', 'mfb_lowpass', 'mfb_highpass', 'mfb_bandpass',
+           'stage_params', 'stage_response', 'cascade_response', 'prototype_sections', 'filter_cascade',
+           'cascade_coeffs', 'resonance_peaks', 'corner_freqs', 'phase_margin',
+           'draw_components', 'monte_carlo']
+# __all__ = filters.__all__.copy()
+
+# Loaded on first use, so `python -m analogcircuits.filters.batch` doesn't
+# find itself already imported
+import importlib
+_lazy_submodules = {'batch': ['read_specs', 'filter_result', 'batch_results', 'write_results', 'run_batch']}
+
+def __getattr__(name):
+    for submodule, names in _lazy_submodules.items():
+        if name == submodule or name in names:
+            module = importlib.import_module(f".{submodule}", __name__)
+            value = module if name == submodule else getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# Active second-order stages (Sallen-Key, multiple feedback) and their cascades
+
+from math import factorial
+import numpy as np
+from analogcircuits.profiling import instrument
+
+# Stages are rational functions num(s) / den(s), stored like `analog_coeffs`:
+# arrays of shape (..., 4), highest power of s first, normalized to den(0) = 1.
+# Third order terms only come from a finite opamp GBW.
+
+def _res(res):
+    "Helper, admittance polynomial of a resistor, ascending powers of s."
+    return [1 / np.asarray(res, dtype=float)]
+
+def _cap(cap):
+    "Helper, admittance polynomial of a capacitor, ascending powers of s."
+    return [0, np.asarray(cap, dtype=float)]
+
+def _padd(*polys):
+    "Helper, sum of polynomials."
+    total = [0] * max(len(poly) for poly in polys)
+    for poly in polys:
+        for i, coeff in enumerate(poly):
+            total[i] = total[i] + coeff
+    return total
+
+def _pmul(poly_one, poly_two):
+    "Helper, product of polynomials."
+    product = [0] * (len(poly_one) + len(poly_two) - 1)
+    for i, coeff_one in enumerate(poly_one):
+        for j, coeff_two in enumerate(poly_two):
+            product[i + j] = product[i + j] + coeff_one * coeff_two
+    return product
+
+def _pscale(poly, factor):
+    "Helper, polynomial times a factor."
+    return [coeff * factor for coeff in poly]
+
+def _coeffs(num, den):
+    "Helper, stage arrays (..., 4) highest power first, den(0) = 1."
+    num, den = (poly + [0] * (4 - len(poly)) for poly in (num, den))
+    coeffs = np.stack(np.broadcast_arrays(*(num[::-1] + den[::-1])), axis=-1).astype(float)
+    coeffs /= coeffs[..., -1:]
+    return coeffs[..., :4], coeffs[..., 4:]
+
+def _sallen_key(y1, y2, y3, y4, y5, gain, opamp_GBW):
+    """
+    Helper, Sallen-Key stage from admittances: y1 input to node A, y2 A to
+    the + input, y3 A to the output, y4 + input to ground, y5 A to ground.
+    The amplifier gain K falls as K / (1 + s K / wt) with a finite GBW.
+    """
+    node = _padd(y1, y2, y3, y5)
+    den = _padd(_pmul(_padd(y2, y4), node), _pscale(_pmul(y2, y2), -1)) # (y2 + y4) yA - y2^2
+    feedback = _pmul(y2, y3)
+    num = _pscale(_pmul(y1, y2), gain)
+    loaded = _pscale([0] + den, gain / (2 * np.pi * np.asarray(opamp_GBW, dtype=float)))
+    return _coeffs(num, _padd(den, _pscale(feedback, -gain), loaded))
+
+def _multiple_feedback(y1, y2, y3, y4, y5, opamp_GBW):
+    """
+    Helper, multiple feedback stage from admittances: y1 input to node A,
+    y2 A to ground, y3 A to the output, y4 A to the - input, y5 - input to
+    the output.  A finite GBW adds s (yA (y4 + y5) - y4^2) / wt.
+    """
+    node = _padd(y1, y2, y3, y4)
+    num = _pscale(_pmul(y1, y4), -1)
+    den = _padd(_pmul(node, y5), _pmul(y3, y4))
+    error = _padd(_pmul(node, _padd(y4, y5)), _pscale(_pmul(y4, y4), -1))
+    loaded = _pscale([0] + error, 1 / (2 * np.pi * np.asarray(opamp_GBW, dtype=float)))
+    return _coeffs(num, _padd(den, loaded))
+
+def sallen_key_lowpass(res_one, res_two, cap_one, cap_two, gain=1, opamp_GBW=np.inf):
+    """
+    Returns the transfer function of a Sallen-Key low-pass stage.
+
+    res_one from the input, res_two to the + input, cap_one fed back from
+    their junction to the output, cap_two from the + input to ground.  All
+    arguments broadcast, e.g. arrays of shape (designs,).
+
+    Parameters
+    ----------
+    res_one, res_two : float or ndarray
+        Resistances in Ohms.
+
+    cap_one, cap_two : float or ndarray
+        Capacitances in F.
+
+    gain : float or ndarray
+        Amplifier gain 1 + Rf / Rg in V/V (default 1, follower).
+
+    opamp_GBW : float or ndarray
+        Opamp gain bandwidth in Hz (default inf, ideal), e.g. the catalog's
+        'GBP (typ)' column.
+
+    Returns
+    -------
+    num, den : ndarray
+        Coefficients in s, shape (..., 4), highest power first.
+
+    """
+    return _sallen_key(_res(res_one), _res(res_two), _cap(cap_one), _cap(cap_two), [0], gain, opamp_GBW)
+
+def sallen_key_highpass(cap_one, cap_two, res_one, res_two, gain=1, opamp_GBW=np.inf):
+    """
+    Returns the transfer function of a Sallen-Key high-pass stage.
+
+    cap_one from the input, cap_two to the + input, res_one fed back from
+    their junction to the output, res_two from the + input to ground.
+    Arguments and returns as for `sallen_key_lowpass`.
+    """
+    return _sallen_key(_cap(cap_one), _cap(cap_two), _res(res_one), _res(res_two), [0], gain, opamp_GBW)
+
+def sallen_key_bandpass(res_one, res_two, res_three, cap_one, cap_two, gain=1, opamp_GBW=np.inf):
+    """
+    Returns the transfer function of a Sallen-Key band-pass stage.
+
+    res_one from the input to node A, cap_one from A to ground, cap_two
+    from A to the + input, res_three from the + input to ground and res_two
+    fed back from A to the output.  Arguments and returns as for
+    `sallen_key_lowpass`.
+    """
+    return _sallen_key(_res(res_one), _cap(cap_two), _res(res_two), _res(res_three), _cap(cap_one),
+                       gain, opamp_GBW)
+
+def mfb_lowpass(res_one, res_two, res_three, cap_one, cap_two, opamp_GBW=np.inf):
+    """
+    Returns the transfer function of a multiple feedback low-pass stage.
+
+    res_one from the input to node A, cap_one from A to ground, res_two fed
+    back from A to the output, res_three from A to the - input and cap_two
+    from the - input to the output.  Inverting, passband gain -res_two / res_one.
+
+    Parameters
+    ----------
+    res_one, res_two, res_three : float or ndarray
+        Resistances in Ohms.
+
+    cap_one, cap_two : float or ndarray
+        Capacitances in F.
+
+    opamp_GBW : float or ndarray
+        Opamp gain bandwidth in Hz (default inf, ideal).
+
+    Returns
+    -------
+    num, den : ndarray
+        Coefficients in s, shape (..., 4), highest power first.
+
+    """
+    return _multiple_feedback(_res(res_one), _cap(cap_one), _res(res_two), _res(res_three), _cap(cap_two),
+                              opamp_GBW)
+
+def mfb_highpass(cap_one, cap_two, cap_three, res_one, res_two, opamp_GBW=np.inf):
+    """
+    Returns the transfer function of a multiple feedback high-pass stage.
+
+    cap_one from the input to node A, res_one from A to ground, cap_three
+    fed back from A to the output, cap_two from A to the - input and
+    res_two from the - input to the output.  Passband gain -cap_one / cap_three.
+    Arguments and returns as for `mfb_lowpass`.
+    """
+    return _multiple_feedback(_cap(cap_one), _res(res_one), _cap(cap_three), _cap(cap_two), _res(res_two),
+                              opamp_GBW)
+
+def mfb_bandpass(res_one, res_two, res_three, cap_one, cap_two, opamp_GBW=np.inf):
+    """
+    Returns the transfer function of a multiple feedback band-pass stage.
+
+    res_one from the input to node A, res_two from A to ground, cap_one
+    from A to the - input, cap_two fed back from A to the output and
+    res_three from the - input to the output.  Center gain
+    -res_three cap_one / (res_one (cap_one + cap_two)).  Arguments and
+    returns as for `mfb_lowpass`.
+    """
+    return _multiple_feedback(_res(res_one), _res(res_two), _cap(cap_two), _cap(cap_one), _res(res_three),
+                              opamp_GBW)
+
+def stage_params(num, den):
+    """
+    Returns natural frequency, Q and passband gain of second-order stages.
+
+    Taken from the s^2, s and constant terms, so with a finite GBW they
+    describe the loaded stage to first order.
+
+    Parameters
+    ----------
+    num, den : ndarray
+        Stage coefficients, shape (..., 4).
+
+    Returns
+    -------
+    freq_natural : ndarray
+        f0 in Hz.
+
+    quality : ndarray
+        Q factor.
+
+    gain : ndarray
+        Passband gain in V/V (DC for low-pass, high frequency for
+        high-pass, at f0 for band-pass), negative when inverting.
+
+    """
+    a2, a1, a0 = den[..., 1], den[..., 2], den[..., 3]
+    freq_natural = np.sqrt(a0 / a2) / (2 * np.pi)
+    quality = np.sqrt(a0 * a2) / a1
+    power = np.argmax(num != 0, axis=-1)[..., np.newaxis] # leading numerator term
+    gain = (np.take_along_axis(num, power, axis=-1) / np.take_along_axis(den, power, axis=-1))[..., 0]
+    return freq_natural, quality, gain
+
+@instrument('response')
+def stage_response(num, den, freqs):
+    """
+    Returns the complex response of stages over a frequency grid.
+
+    Parameters
+    ----------
+    num, den : ndarray
+        Stage coefficients, shape (..., 4), e.g. (designs, 4).
+
+    freqs : ndarray
+        Frequencies in Hz, shape (frequencies,).
+
+    Returns
+    -------
+    transfer : ndarray
+        Vout/Vin, shape (..., frequencies).
+
+    """
+    s = 2j * np.pi * np.asarray(freqs)
+    num_s = num[..., :1]
+    den_s = den[..., :1]
+    for i in range(1, num.shape[-1]): # Horner
+        num_s = num_s * s + num[..., i:i + 1]
+        den_s = den_s * s + den[..., i:i + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        transfer = num_s / den_s
+    return transfer
+
+def cascade_response(stages, freqs):
+    """
+    Returns the complex response of stages in cascade.
+
+    Parameters
+    ----------
+    stages : sequence of (num, den)
+        Stage coefficients, broadcast against each other.
+
+    freqs : ndarray
+        Frequencies in Hz.
+
+    Returns
+    -------
+    transfer : ndarray
+        Product of the stage responses, shape (..., frequencies).
+
+    """
+    transfer = 1
+    for num, den in stages:
+        transfer = transfer * stage_response(num, den, freqs)
+    return transfer
+
+def _bessel_poles(order):
+    "Helper, Bessel poles normalized to -3 dB at 1 rad/s."
+    coeffs = np.array([factorial(2 * order - k) / (2**(order - k) * factorial(k) * factorial(order - k))
+                       for k in range(order + 1)]) # ascending powers of s
+    poles = np.roots(coeffs[::-1])
+    # |theta(jw)|^2 = 2 theta(0)^2 at the -3 dB point, a polynomial in w^2
+    magnitude = np.polynomial.polynomial.polymul(coeffs, coeffs * (-1.0)**np.arange(order + 1))[::2]
+    magnitude *= (-1.0)**np.arange(magnitude.size)
+    magnitude[0] -= 2 * coeffs[0]**2
+    roots = np.polynomial.polynomial.polyroots(magnitude)
+    omega = np.sqrt(roots[(np.abs(roots.imag) < 1e-9) & (roots.real > 0)].real.min())
+    return poles / omega
+
+def prototype_sections(kind, order):
+    """
+    Returns the sections of a normalized low-pass prototype, -3 dB at 1 Hz.
+
+    Parameters
+    ----------
+    kind : str
+        'butterworth' or 'bessel'.
+
+    order : int
+        Filter order, >= 1.
+
+    Returns
+    -------
+    freq_scales : ndarray
+        Natural frequency of each section relative to the corner.
+
+    qualities : ndarray
+        Q of each section, nan for the first-order section of odd orders.
+
+    """
+    match kind:
+        case "butterworth":
+            k = np.arange(1, order // 2 + 1)
+            qualities = 1 / (2 * np.sin((2 * k - 1) * np.pi / (2 * order)))
+            freq_scales = np.ones(qualities.size)
+            if order % 2:
+                freq_scales, qualities = np.append(1.0, freq_scales), np.append(np.nan, qualities)
+        case "bessel":
+            poles = _bessel_poles(order)
+            poles = poles[poles.imag >= -1e-12]
+            freq_scales = np.abs(poles)
+            qualities = np.where(np.abs(poles.imag) > 1e-9, freq_scales / (-2 * poles.real), np.nan)
+            order_idx = np.argsort(np.nan_to_num(qualities, nan=0))
+            freq_scales, qualities = freq_scales[order_idx], qualities[order_idx]
+        case _:
+            raise ValueError(f"Not a filter kind: {kind}")
+    return freq_scales, qualities
+
+def filter_cascade(kind, order, freq_corner, highpass=False, res=10e3, cap=10e-9, opamp_GBW=np.inf):
+    """
+    Designs a Butterworth or Bessel filter as unity-gain Sallen-Key stages.
+
+    Low-pass stages use equal resistors res, high-pass stages equal
+    capacitors cap; odd orders start with a passive RC (CR) section.
+    freq_corner may be an array of designs, every stage then holds all
+    designs and `cascade_response` evaluates them in one pass.
+
+    Parameters
+    ----------
+    kind : str
+        'butterworth' or 'bessel'.
+
+    order : int
+        Filter order.
+
+    freq_corner : float or ndarray
+        -3 dB frequency in Hz, shape (designs,).
+
+    highpass : bool
+        High-pass instead of low-pass (default False).
+
+    res : float or ndarray
+        Resistance in Ohms of the low-pass stages (default 10 kOhm).
+
+    cap : float or ndarray
+        Capacitance in F of the high-pass stages (default 10 nF).
+
+    opamp_GBW : float or ndarray
+        Opamp gain bandwidth in Hz (default inf, ideal).
+
+    Returns
+    -------
+    stages : list of (num, den)
+        Stage coefficients, shape (designs, 4) each.
+
+    components : list of tuple
+        Component values per stage, in the order of the stage function
+        (res, cap for the first-order section).
+
+    """
+    stages, components = [], []
+    for freq_scale, quality in zip(*prototype_sections(kind, order)):
+        omega = 2 * np.pi * np.asarray(freq_corner, dtype=float)
+        omega = omega / freq_scale if highpass else omega * freq_scale
+        if np.isnan(quality): # first-order section, tau = RC = 1 / omega
+            tau = 1 / omega
+            stages.append(_coeffs([0, tau] if highpass else [1], [1, tau]))
+            components.append((tau / cap, cap) if highpass else (res, tau / res))
+        elif highpass:
+            res_one, res_two = 1 / (2 * quality * omega * cap), 2 * quality / (omega * cap)
+            stages.append(sallen_key_highpass(cap, cap, res_one, res_two, 1, opamp_GBW))
+            components.append((cap, cap, res_one, res_two))
+        else:
+            cap_one, cap_two = 2 * quality / (omega * res), 1 / (2 * quality * omega * res)
+            stages.append(sallen_key_lowpass(res, res, cap_one, cap_two, 1, opamp_GBW))
+            components.append((res, res, cap_one, cap_two))
+    return stages, components
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# Run in analogcircuits: python3 -m analogcircuits.filters.batch specs.csv -o results.jsonl
+# Non-interactive passive filter evaluation over a stream of specs
+
+import csv
+from collections import deque
+from functools import partial
+from itertools import islice
+import json
+import math
+import sys
+import numpy as np
+from analogcircuits.elements import(cap_imp, ind_imp, parallel_res)
+from analogcircuits.filters.passive import(filter_sweep, gain_db, sweep_freq_start, sweep_freq_stop,
+                                           sweep_accuracy)
+from analogcircuits.filters.stream import analog_coeffs
+from analogcircuits.filters.transfer import corner_freqs
+
+component_names = {'r': 'res', 'c': 'cap', 'l': 'ind'}
+summary_fields = ['id', 'type', 'comp_one', 'comp_two', 'freq_corner', 'output_impedance',
+                  'freq_3db', 'error']
+max_sweep_points = 1_000_000 # per spec, bounds memory for tiny accuracies
+
+def read_specs(source, fmt=None):
+    """
+    Yields filter specs, one dict per CSV row or JSON line, lazily.
+
+    Each spec has 'type' ('rc', 'lc', 'cr' or 'cl') and the two component
+    values, either as 'comp_one'/'comp_two' in the order of the filter's
+    name or by name ('res', 'cap', 'ind').  Optional keys: 'id',
+    'freq_start', 'freq_stop' and 'accuracy'.
+
+    Parameters
+    ----------
+    source : str or file
+        Path, '-' for stdin, or an open text file.
+
+    fmt : str, optional
+        'csv' or 'jsonl' (default: from the file extension, else 'jsonl').
+
+    Yields
+    ------
+    spec : dict
+        Raw spec, values as read (strings for CSV).  A JSON line that
+        doesn't parse yields {'error': ...}, which `filter_result` turns
+        into an error record.
+
+    """
+    if fmt is None:
+        name = source if isinstance(source, str) else getattr(source, 'name', '')
+        fmt = 'csv' if str(name).lower().endswith('.csv') else 'jsonl'
+    if source == '-':
+        source = sys.stdin
+    if isinstance(source, str):
+        with open(source, newline='') as spec_file:
+            yield from read_specs(spec_file, fmt)
+        return
+    if fmt == 'csv':
+        yield from csv.DictReader(source)
+    elif fmt == 'jsonl':
+        for line in source:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as err:
+                    yield {'error': f"JSONDecodeError: {err}"}
+    else:
+        raise ValueError(f"Not a spec format: {fmt}")
+
+def _positive(spec, key):
+    "Helper, spec value as a float, which must be finite and above 0."
+    value = float(spec[key])
+    if not (math.isfinite(value) and value > 0):
+        raise ValueError(f"{key} must be a finite value above 0, not {spec[key]!r}")
+    return value
+
+def _component(spec, position):
+    "Helper, component value by position, from comp_one/comp_two or by name."
+    key = ('comp_one', 'comp_two')[position]
+    if spec.get(key) in (None, ''):
+        key = component_names[spec['type'][position]]
+    return _positive(spec, key)
+
+def _json_list(values):
+    "Helper, array as a list with null for nan and inf, which JSON can't hold."
+    return np.where(np.isfinite(values), values, None).tolist()
+
+def filter_result(spec, response=False):
+    """
+    Evaluates one filter spec: corner, output impedance and response.
+
+    The output impedance is that of the two components in parallel at the
+    corner, in magnitude, as printed by `user_input`.  Bad specs, e.g.
+    components that aren't finite and positive, give a result with only
+    'id' and 'error', so one typo does not stop a batch.  The -3 dB points
+    are analytic, relative to the passband gain of 1.
+
+    Parameters
+    ----------
+    spec : dict
+        Filter spec, see `read_specs`.
+
+    response : bool
+        Include 'freqs', 'gain_db' and 'phase_deg' lists (default False).
+
+    Returns
+    -------
+    result : dict
+        'id', 'type', 'comp_one', 'comp_two', 'freq_corner' (Hz),
+        'output_impedance' (Ohms) and 'freq_3db' (Hz, -3 dB crossings).
+
+    """
+    if not isinstance(spec, dict):
+        return {'id': None, 'error': f"TypeError: spec must be an object, not {type(spec).__name__}"}
+    if 'error' in spec: # unreadable line from `read_specs`
+        return {'id': spec.get('id'), 'error': str(spec['error'])}
+    try:
+        filter_type = str(spec['type']).strip().lower()
+        if filter_type not in ('rc', 'lc', 'cr', 'cl'):
+            raise ValueError(f"Not a filter type: {filter_type}")
+        spec = dict(spec, type=filter_type)
+        comp_one, comp_two = _component(spec, 0), _component(spec, 1)
+        sweep = [_positive(spec, key) if spec.get(key) not in (None, '') else default
+                 for key, default in (('freq_start', sweep_freq_start), ('freq_stop', sweep_freq_stop),
+                                      ('accuracy', sweep_accuracy))]
+        if sweep[1] > sweep[0] and np.log(sweep[1] / sweep[0]) / np.log1p(sweep[2]) > max_sweep_points:
+            raise ValueError(f"accuracy {sweep[2]} needs more than {max_sweep_points} sweep points")
+        # uncached: a batch is read once, thousands of entries would only churn the cache
+        freq_corner, freqs, transfer = filter_sweep.uncached(filter_type, comp_one, comp_two, *sweep)
+        imped_funcs = {'r': lambda res, freq: res, 'c': cap_imp, 'l': ind_imp}
+        mag_one = np.abs(imped_funcs[filter_type[0]](comp_one, freq_corner))
+        mag_two = np.abs(imped_funcs[filter_type[1]](comp_two, freq_corner))
+        corners = corner_freqs(*analog_coeffs(filter_type, comp_one, comp_two), ref_gain=1)
+        output_impedance = float(parallel_res(mag_one, mag_two))
+        if not (math.isfinite(freq_corner) and math.isfinite(output_impedance)):
+            raise FloatingPointError("components out of the floating point range")
+    except (KeyError, ValueError, TypeError, ArithmeticError) as err:
+        return {'id': spec.get('id'), 'error': f"{type(err).__name__}: {err}"}
+    result = {'id': spec.get('id'), 'type': filter_type, 'comp_one': comp_one, 'comp_two': comp_two,
+              'freq_corner': float(freq_corner),
+              'output_impedance': output_impedance,
+              'freq_3db': corners[np.isfinite(corners)].tolist()}
+    if response:
+        result['freqs'] = freqs.tolist()
+        result['gain_db'] = _json_list(gain_db(transfer)) # inf at a lossless resonance
+        result['phase_deg'] = _json_list(np.degrees(np.angle(transfer)))
+    return result
+
+def _evaluate_chunk(specs, response):
+    "Helper, evaluates a list of specs in a worker."
+    return [filter_result(spec, response) for spec in specs]
+
+def batch_results(specs, response=False, workers=1, chunk_size=256):
+    """
+    Yields results for a stream of specs, in input order.
+
+    Specs are read chunk_size at a time and at most 2 * workers chunks are
+    in flight, so memory is bounded however long the stream is.
+
+    Parameters
+    ----------
+    specs : iterable of dict
+        Filter specs, e.g. from `read_specs`.
+
+    response : bool
+        Include the response lists (default False).
+
+    workers : int
+        Processes (default 1, evaluates in this process).
+
+    chunk_size : int
+        Specs per task (default 256).
+
+    Yields
+    ------
+    result : dict
+        As from `filter_result`.
+
+    """
+    specs = iter(specs)
+    chunks = iter(lambda: list(islice(specs, chunk_size)), [])
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _evaluate_chunk(chunk, response)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    evaluate = partial(_evaluate_chunk, response=response)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque(pool.submit(evaluate, chunk) for chunk in islice(chunks, 2 * workers))
+        while pending:
+            done = pending.popleft().result()
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(evaluate, chunk))
+            yield from done
+
+def write_results(results, target, fmt='jsonl'):
+    """
+    Writes results as they arrive, one JSON line or CSV row each.
+
+    CSV holds the summary columns only, with the -3 dB crossings joined by
+    ';'; use JSON lines for the response lists.
+
+    Parameters
+    ----------
+    results : iterable of dict
+        From `batch_results`.
+
+    target : str or file
+        Path, '-' for stdout, or an open text file.
+
+    fmt : str
+        'jsonl' (default) or 'csv'.
+
+    Returns
+    -------
+    count : int
+        Results written.
+
+    """
+    if target == '-':
+        target = sys.stdout
+    if isinstance(target, str):
+        with open(target, 'w', newline='') as out_file:
+            return write_results(results, out_file, fmt)
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(target, summary_fields, extrasaction='ignore')
+        writer.writeheader()
+        for result in results:
+            if 'freq_3db' in result:
+                result = dict(result, freq_3db=';'.join(repr(freq) for freq in result['freq_3db']))
+            writer.writerow(result)
+            count += 1
+    elif fmt == 'jsonl':
+        for result in results:
+            target.write(json.dumps(result, allow_nan=False) + "\n")
+            count += 1
+    else:
+        raise ValueError(f"Not a result format: {fmt}")
+    return count
+
+def run_batch(source, target, in_fmt=None, out_fmt=None, response=False, workers=1, chunk_size=256):
+    """
+    Reads specs from source and writes results to target, streaming.
+
+    Formats default to the file extensions ('.csv', else JSON lines).
+
+    Returns
+    -------
+    count : int
+        Results written.
+
+    """
+    if out_fmt is None:
+        out_fmt = 'csv' if str(target).lower().endswith('.csv') else 'jsonl'
+    results = batch_results(read_specs(source, in_fmt), response, workers, chunk_size)
+    return write_results(results, target, out_fmt)
+
+if __name__ == "__main__":
+    import argparse
+    my_parser = argparse.ArgumentParser(prog='batch',
+                                        description='Evaluate passive filter specs from CSV or JSON lines.')
+    my_parser.add_argument('specs', type=str, nargs='?', default='-', help='Spec file (stdin)')
+    my_parser.add_argument('-o', '--output', type=str, default='-', help='Result file (stdout)')
+    my_parser.add_argument('--input-format', choices=['csv', 'jsonl'], default=None)
+    my_parser.add_argument('--output-format', choices=['csv', 'jsonl'], default=None)
+    my_parser.add_argument('--response', action='store_true', help='Include the response (JSON lines)')
+    my_parser.add_argument('--workers', type=int, default=1, help='Worker processes (1)')
+    my_parser.add_argument('--chunk-size', type=int, default=256, help='Specs per task (256)')
+    args = my_parser.parse_args()
+    run_batch(args.specs, args.output, args.input_format, args.output_format, args.response,
+              args.workers, args.chunk_size)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# Headless Bode plot rendering, decimated to the pixel width of the plot
+
+import os
+from functools import partial
+import numpy as np
+from analogcircuits.profiling import instrument
+
+def minmax_decimate(freqs, gain_db, width_px=1000):
+    """
+    Reduces a sweep to per-pixel min/max envelopes in log-frequency.
+
+    Each of width_px log-spaced bins keeps its minimum and maximum, in the
+    order they occur, so peaks and notches survive decimation.
+
+    Parameters
+    ----------
+    freqs : ndarray
+        Sorted frequencies in Hz, > 0.
+
+    gain_db : ndarray
+        Gain in dB, same length as freqs.
+
+    width_px : int
+        Number of horizontal pixels (bins).
+
+    Returns
+    -------
+    freqs_out : ndarray
+        Frequencies in Hz, at most 2 * width_px.
+
+    gain_out : ndarray
+        Gain in dB at freqs_out.
+
+    """
+    freqs, gain_db = np.asarray(freqs), np.asarray(gain_db)
+    if freqs.size <= 2 * width_px:
+        return freqs, gain_db
+    log_freqs = np.log10(freqs)
+    edges = np.linspace(log_freqs[0], log_freqs[-1], width_px + 1)
+    starts = np.unique(np.searchsorted(log_freqs, edges[:-1]))
+    starts = starts[starts < freqs.size]
+    low = np.where(np.isnan(gain_db), np.inf, gain_db)
+    high = np.where(np.isnan(gain_db), -np.inf, gain_db)
+    bins = np.repeat(np.arange(starts.size), np.diff(np.append(starts, freqs.size)))
+    idx = np.arange(freqs.size)
+    # first index reaching each bin's min and max, all O(n) reduceat passes
+    is_min = low == np.minimum.reduceat(low, starts)[bins]
+    is_max = high == np.maximum.reduceat(high, starts)[bins]
+    first_min = np.minimum.reduceat(np.where(is_min, idx, freqs.size), starts)
+    first_max = np.minimum.reduceat(np.where(is_max, idx, freqs.size), starts)
+    keep = np.union1d(first_min, first_max)
+    return freqs[keep], gain_db[keep]
+
+@instrument('db')
+def _gain_db(freqs, transfer, width_px):
+    "Helper, decimated gain in dB of a complex or magnitude response."
+    with np.errstate(divide='ignore'):
+        gain_db = np.abs(transfer) # the one full-length temporary, rest in place
+        np.log10(gain_db, out=gain_db)
+        gain_db *= 20
+    return minmax_decimate(freqs, gain_db, width_px)
+
+def _setup(axes):
+    "Helper, static Bode axes decoration; returns the trace and corner marker."
+    axes.set_xscale('log')
+    axes.grid(which='both')
+    axes.set_xlabel("Frequency (Hz)")
+    axes.set_ylabel("Gain (dB)")
+    line, = axes.plot([], [])
+    corner_line = axes.axvline(1, linestyle='dashed', color='gray')
+    return line, corner_line
+
+def _update(axes, line, corner_line, freqs, gain_db, corner_freq=None, title="Bode plot"):
+    "Helper, points the reused trace at a new sweep, keeps ticks and grid."
+    line.set_data(freqs, gain_db)
+    finite = gain_db[np.isfinite(gain_db)]
+    axes.set_xlim(freqs[0], freqs[-1])
+    if finite.size:
+        margin = 0.05 * max(finite.max() - finite.min(), 1)
+        axes.set_ylim(finite.min() - margin, finite.max() + margin)
+    corner_line.set_visible(corner_freq is not None)
+    if corner_freq is not None:
+        corner_line.set_xdata([corner_freq, corner_freq])
+    axes.set_title(f"{title} ({corner_freq} Hz)" if corner_freq is not None else title)
+
+def _figure(width_px, height_px, dpi):
+    "Helper, a Figure on the Agg canvas, no pyplot or GUI backend involved."
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    return figure
+
+@instrument('plot')
+def render_bode(freqs, transfer, filename, corner_freq=None, title="Bode plot",
+                width_px=1000, height_px=600, dpi=100):
+    """
+    Saves a Bode magnitude plot without a display (Agg canvas).
+
+    Parameters
+    ----------
+    freqs : ndarray
+        Sorted frequencies in Hz.
+
+    transfer : ndarray
+        Complex or magnitude Vout/Vin at freqs.
+
+    filename : str
+        Output file, format from the extension (.png, .svg, .pdf).
+
+    corner_freq : float, optional
+        Corner frequency in Hz to mark.
+
+    title : str
+        Plot title.
+
+    width_px, height_px, dpi : int
+        Image size; the sweep is decimated to width_px bins.
+
+    Returns
+    -------
+    filename : str
+        The written file.
+
+    """
+    figure = _figure(width_px, height_px, dpi)
+    axes = figure.add_subplot()
+    line, corner_line = _setup(axes)
+    _update(axes, line, corner_line, *_gain_db(freqs, transfer, width_px), corner_freq, title)
+    figure.savefig(filename)
+    return filename
+
+@instrument('plot')
+def export_bode_plots(plots, directory, fmt='png', width_px=1000, height_px=600, dpi=100, workers=1):
+    """
+    Saves many Bode plots in one call, reusing a single figure, axes and
+    trace so tick and grid artists are built once.
+
+    Parameters
+    ----------
+    plots : iterable of dict
+        Each with 'name', 'freqs', 'transfer' and optionally 'corner_freq'
+        and 'title'.
+
+    directory : str
+        Output directory, created if missing.
+
+    fmt : str
+        Image format, 'png' or 'svg' (anything matplotlib saves).
+
+    width_px, height_px, dpi : int
+        Image size; each sweep is decimated to width_px bins.
+
+    workers : int
+        Processes to render with (default 1, in this process); each renders
+        every workers-th plot on its own figure.
+
+    Returns
+    -------
+    filenames : list of str
+        The written files, in input order.
+
+    """
+    os.makedirs(directory, exist_ok=True)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        plots = list(plots)
+        shares = [plots[i::workers] for i in range(workers)]
+        render = partial(export_bode_plots, directory=directory, fmt=fmt,
+                         width_px=width_px, height_px=height_px, dpi=dpi)
+        with ProcessPoolExecutor(workers) as pool:
+            done = list(pool.map(render, shares))
+        filenames = [None] * len(plots)
+        for i, share in enumerate(done):
+            filenames[i::workers] = share
+        return filenames
+    figure = _figure(width_px, height_px, dpi)
+    axes = figure.add_subplot()
+    line, corner_line = _setup(axes)
+    filenames = []
+    for plot in plots:
+        _update(axes, line, corner_line, *_gain_db(plot['freqs'], plot['transfer'], width_px),
+                plot.get('corner_freq'), plot.get('title', plot['name']))
+        filename = os.path.join(directory, f"{plot['name']}.{fmt}")
+        figure.savefig(filename)
+        filenames.append(filename)
+    return filenames
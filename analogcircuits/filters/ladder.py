@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# Cascaded ladder filters as ABCD (chain) matrices stacked over frequency
+
+from functools import reduce
+import numpy as np
+from analogcircuits.elements import(cap_imp, ind_imp)
+
+def series_abcd(imped):
+    """
+    Returns the ABCD matrix of a series impedance, shape (..., 2, 2).
+
+    Parameters
+    ----------
+    imped : complex or ndarray
+        Impedance in Ohms, any shape (e.g. (designs, frequencies)).
+
+    Returns
+    -------
+    abcd : ndarray
+        [[1, Z], [0, 1]] for every element of imped.
+
+    """
+    imped = np.asarray(imped, dtype=complex)
+    abcd = np.zeros(imped.shape + (2, 2), dtype=complex)
+    abcd[..., 0, 0] = 1
+    abcd[..., 0, 1] = imped
+    abcd[..., 1, 1] = 1
+    return abcd
+
+def shunt_abcd(imped):
+    """
+    Returns the ABCD matrix of a shunt impedance, shape (..., 2, 2).
+
+    Parameters
+    ----------
+    imped : complex or ndarray
+        Impedance to ground in Ohms, any shape.
+
+    Returns
+    -------
+    abcd : ndarray
+        [[1, 0], [1/Z, 1]] for every element of imped.
+
+    """
+    imped = np.asarray(imped, dtype=complex)
+    abcd = np.zeros(imped.shape + (2, 2), dtype=complex)
+    abcd[..., 0, 0] = 1
+    with np.errstate(divide='ignore'):
+        abcd[..., 1, 0] = 1 / imped
+    abcd[..., 1, 1] = 1
+    return abcd
+
+def cascade_abcd(stages):
+    """
+    Returns the ABCD matrix of stages in cascade, input stage first.
+
+    Parameters
+    ----------
+    stages : sequence of ndarray
+        ABCD matrices of shape (..., 2, 2), broadcast against each other.
+
+    Returns
+    -------
+    abcd : ndarray
+        Batched matrix product of all stages.
+
+    """
+    abcd = reduce(np.matmul, stages)
+    return abcd
+
+def ladder_abcd(series_imps, shunt_imps):
+    """
+    Returns the ABCD matrix of a ladder of alternating series/shunt elements.
+
+    The ladder starts with series_imps[0], then shunt_imps[0], and so on.
+    series_imps may have one more entry than shunt_imps, ending the ladder
+    with a series element.
+
+    Parameters
+    ----------
+    series_imps : sequence of complex or ndarray
+        Series impedances in Ohms, input side first.
+
+    shunt_imps : sequence of complex or ndarray
+        Shunt impedances in Ohms, input side first.
+
+    Returns
+    -------
+    abcd : ndarray
+        ABCD matrix of the whole ladder, shape (..., 2, 2).
+
+    """
+    if not 0 <= len(series_imps) - len(shunt_imps) <= 1:
+        raise ValueError("Ladder must alternate series and shunt elements, series first.")
+    stages = []
+    for i, series_imp in enumerate(series_imps):
+        stages.append(series_abcd(series_imp))
+        if i < len(shunt_imps):
+            stages.append(shunt_abcd(shunt_imps[i]))
+    return cascade_abcd(stages)
+
+def rc_ladder(res, cap, freqs, order=1):
+    """
+    Returns the ABCD matrix of a low-pass RC ladder of `order` R-C sections.
+
+    Parameters
+    ----------
+    res : float or sequence
+        Resistance in Ohms, one value for all sections or one per section.
+
+    cap : float or sequence
+        Capacitance in F, one value for all sections or one per section.
+
+    freqs : ndarray
+        Frequencies in Hz, broadcasts against the component values.
+
+    order : int
+        Number of sections, ignored when per-section values are given.
+
+    Returns
+    -------
+    abcd : ndarray
+        ABCD matrix, shape freqs.shape + (2, 2).
+
+    """
+    order = max(order, len(np.atleast_1d(res)), len(np.atleast_1d(cap)))
+    res, cap = _per_section(res, order), _per_section(cap, order)
+    return ladder_abcd(res, [cap_imp(c, freqs) for c in cap])
+
+def lc_ladder(inds, caps, freqs):
+    """
+    Returns the ABCD matrix of a low-pass LC ladder (series L, shunt C).
+
+    The filter order is len(inds) + len(caps), e.g. a 5th order ladder is
+    L-C-L-C-L with three inductors and two capacitors.
+
+    Parameters
+    ----------
+    inds : sequence
+        Series inductances in H, input side first.
+
+    caps : sequence
+        Shunt capacitances in F, input side first.
+
+    freqs : ndarray
+        Frequencies in Hz.
+
+    Returns
+    -------
+    abcd : ndarray
+        ABCD matrix, shape freqs.shape + (2, 2).
+
+    """
+    return ladder_abcd([ind_imp(l, freqs) for l in inds],
+                       [cap_imp(c, freqs) for c in caps])
+
+def ladder_response(abcd, freqs, source_imp=0, load_imp=None, ref_gain=None):
+    """
+    Returns the loaded response of a two-port given by its ABCD matrix.
+
+    Parameters
+    ----------
+    abcd : ndarray
+        ABCD matrix, shape (..., frequencies, 2, 2).
+
+    freqs : ndarray
+        Frequencies in Hz matching the frequency axis of abcd.
+
+    source_imp : complex or ndarray
+        Source impedance in Ohms (default 0, ideal source).
+
+    load_imp : complex or ndarray, optional
+        Load impedance in Ohms (default None, open circuit).
+
+    ref_gain : float or ndarray, optional
+        Passband gain in V/V for the -3 dB points, e.g. the DC gain
+        load_imp / (load_imp + source_imp + series resistance) of a
+        low-pass ladder (default: the gain at the passband end of the
+        sweep, see `minus_3db_freqs`).
+
+    Returns
+    -------
+    transfer : ndarray
+        Vout/Vsource.
+
+    input_imp : ndarray
+        Impedance in Ohms looking into the input with the load attached.
+
+    output_imp : ndarray
+        Impedance in Ohms looking into the output with the source attached.
+
+    corners : ndarray or list of ndarray
+        -3 dB frequencies in Hz, see `minus_3db_freqs`.
+
+    """
+    a, b = abcd[..., 0, 0], abcd[..., 0, 1]
+    c, d = abcd[..., 1, 0], abcd[..., 1, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if load_imp is None:
+            transfer = 1 / (a + source_imp * c)
+            input_imp = a / c
+        else:
+            transfer = load_imp / (a * load_imp + b + source_imp * (c * load_imp + d))
+            input_imp = (a * load_imp + b) / (c * load_imp + d)
+        output_imp = (d * source_imp + b) / (c * source_imp + a)
+    if ref_gain is None:
+        ref_gain = _edge_gain(transfer)
+    corners = minus_3db_freqs(freqs, transfer, ref_gain)
+    return transfer, input_imp, output_imp, corners
+
+def _edge_gain(transfer):
+    "Helper, the larger magnitude of the first and last frequency, the passband end of a low- or high-pass."
+    ends = np.abs(np.stack((transfer[..., 0], transfer[..., -1]), axis=-1))
+    return np.max(np.where(np.isfinite(ends), ends, 0), axis=-1)
+
+def minus_3db_freqs(freqs, transfer, ref_gain=None):
+    """
+    Returns the frequencies where |transfer| crosses 3 dB below ref_gain.
+
+    Crossings are interpolated linearly in dB over log-frequency.
+
+    Parameters
+    ----------
+    freqs : ndarray
+        Frequencies in Hz, shape (frequencies,).
+
+    transfer : ndarray
+        Complex or magnitude response, shape (..., frequencies).
+
+    ref_gain : float or ndarray, optional
+        Passband gain in V/V, one per response (default: the larger
+        magnitude at the two ends of the sweep, the DC gain of a low-pass
+        or the high-frequency gain of a high-pass).  The default is only
+        right when the sweep reaches well into the passband; pass the
+        known gain otherwise, e.g. 1 for the unloaded passive filters.
+
+    Returns
+    -------
+    corners : ndarray or list of ndarray
+        Crossing frequencies in Hz; a list with one array per design for
+        batched (2-D or more) responses.
+
+    """
+    with np.errstate(divide='ignore'):
+        gain_db = 20 * np.log10(np.abs(transfer))
+    if ref_gain is None:
+        ref_gain = _edge_gain(transfer)
+    with np.errstate(divide='ignore'):
+        ref_db = 20 * np.log10(np.asarray(ref_gain))[..., np.newaxis]
+    level = gain_db - (ref_db - 3.0103) # 10 * log10(2)
+
+    log_freqs = np.log10(freqs)
+    above = level >= 0
+    crossing = above[..., 1:] != above[..., :-1]
+    levels = level.reshape(-1, level.shape[-1])
+    crossing = crossing.reshape(-1, crossing.shape[-1])
+    corners = []
+    for row, cross in zip(levels, crossing):
+        idx = np.flatnonzero(cross)
+        level_lo, level_hi = row[idx], row[idx + 1]
+        frac = level_lo / (level_lo - level_hi)
+        corners.append(10 ** (log_freqs[idx] + frac * (log_freqs[idx + 1] - log_freqs[idx])))
+    if level.ndim == 1:
+        return corners[0]
+    return corners
+
+def _per_section(values, order):
+    "Helper, repeats a scalar component value for every section."
+    values = np.atleast_1d(values)
+    if values.size == 1:
+        values = np.repeat(values, order)
+    return list(values)
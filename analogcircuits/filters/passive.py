@@ -2,8 +2,15 @@
 # Run in analogcircuits: python3 -m analogcircuits.filters.passive
 
 import numpy as np
-import matplotlib.pyplot as plt
-from analogcircuits.elements import(voltage_divider, cap_imp, ind_imp, parallel_res)
+from analogcircuits.elements import(voltage_divider, divider_transfer, cap_imp, ind_imp, parallel_res)
+from analogcircuits.filters.sweep import log_sweep
+from analogcircuits.filters.bode import render_bode
+from analogcircuits.cache import cached
+from analogcircuits.profiling import instrument
+
+sweep_freq_start = 0.1 # Hz
+sweep_freq_stop = 10e6 # Hz
+sweep_accuracy = 0.01 # relative freq step
 
 def rc_filter(res, cap):
     freq_corner = 1 / (2 * np.pi * res * cap)
@@ -21,20 +28,109 @@ def cl_filter(cap, ind):
     freq_corner = 1 / (2 * np.pi * np.sqrt(ind * cap))
     return freq_corner
 
-def filter_signal(freqs, imped_one, imped_two):
+def _response_buffer(out, dtype, *args):
+    "Helper, complex buffer of the broadcast shape of components and freqs."
+    if out is None:
+        out = np.empty(np.broadcast_shapes(*(np.shape(arg) for arg in args)), 
+                       np.result_type(dtype, np.complex64))
+    return out
+
+@instrument('response')
+def rc_response(res, cap, freqs, out=None, dtype=np.float64):
+    """
+    Complex Vout/Vin of a low-pass RC filter.  Pass component arrays of shape
+    (designs, 1), e.g. via `design_axis`, to get (designs, frequencies).
+    Computed in place in one complex array (out, if given); dtype=np.float32
+    halves it to complex64.
+    """
+    transfer = cap_imp(cap, freqs, out=_response_buffer(out, dtype, res, cap, freqs))
+    return divider_transfer(res, transfer, out=transfer)
+
+@instrument('response')
+def lc_response(ind, cap, freqs, out=None, dtype=np.float64):
+    "Complex Vout/Vin of a low-pass LC filter, broadcasts like `rc_response`."
+    transfer = cap_imp(cap, freqs, out=_response_buffer(out, dtype, ind, cap, freqs))
+    return divider_transfer(ind_imp(ind, freqs, dtype=dtype), transfer, out=transfer)
+
+@instrument('response')
+def cr_response(cap, res, freqs, out=None, dtype=np.float64):
+    "Complex Vout/Vin of a high-pass CR filter, broadcasts like `rc_response`."
+    transfer = cap_imp(cap, freqs, out=_response_buffer(out, dtype, cap, res, freqs))
+    return divider_transfer(transfer, res, out=transfer)
+
+@instrument('response')
+def cl_response(cap, ind, freqs, out=None, dtype=np.float64):
+    "Complex Vout/Vin of a high-pass CL filter, broadcasts like `rc_response`."
+    transfer = cap_imp(cap, freqs, out=_response_buffer(out, dtype, cap, ind, freqs))
+    return divider_transfer(transfer, ind_imp(ind, freqs, dtype=dtype), out=transfer)
+
+@instrument('sweep')
+@cached
+def filter_sweep(filter_type, comp_one, comp_two, freq_start=sweep_freq_start, 
+                 freq_stop=sweep_freq_stop, accuracy=sweep_accuracy, dtype=np.float64):
+    """
+    Corner, frequency grid and complex response of a passive filter.  Cached on
+    disk (see `analogcircuits.cache`), repeated sweeps load memory-mapped.
+    Component order follows the filter's name, e.g. ('rc', res, cap).
+    dtype=np.float32 gives a complex64 response.
+    """
+    corner_funcs = {'rc': rc_filter, 'lc': lc_filter, 'cr': cr_filter, 'cl': cl_filter}
+    response_funcs = {'rc': rc_response, 'lc': lc_response, 'cr': cr_response, 'cl': cl_response}
+    freq_corner = corner_funcs[filter_type](comp_one, comp_two)
+    freqs = log_sweep(freq_start, freq_stop, accuracy, features=freq_corner)
+    return freq_corner, freqs, response_funcs[filter_type](comp_one, comp_two, freqs, dtype=dtype)
+
+@instrument('signal')
+def filter_signal(freqs, imped_one, imped_two, out=None, dtype=np.float64):
+    """
+    Sine input and divider output over freqs.  out is an optional pair of
+    buffers (vin real, vout complex) filled in place; dtype=np.float32 keeps
+    both in single precision.
+    """
     voltage_amplitude = 1 # V
     voltage_offset = 0 # V
-    voltage_in_freq_domain = voltage_amplitude * np.sin(2 * np.pi * freqs) + voltage_offset
-    voltage_out_freq_domain = voltage_divider(voltage_in_freq_domain, imped_one, imped_two) # filters are voltage dividers
+    vin_out, vout_out = (None, None) if out is None else out
+    if vin_out is None:
+        vin_out = np.empty(np.shape(freqs), np.finfo(dtype).dtype)
+    voltage_in_freq_domain = np.multiply(freqs, 2 * np.pi, out=vin_out)
+    np.sin(voltage_in_freq_domain, out=voltage_in_freq_domain)
+    voltage_in_freq_domain *= voltage_amplitude
+    voltage_in_freq_domain += voltage_offset
+    voltage_out_freq_domain = voltage_divider(voltage_in_freq_domain, imped_one, imped_two,
+                                              out=vout_out, dtype=dtype) # filters are voltage dividers
     return voltage_in_freq_domain, voltage_out_freq_domain
 
-def filter_bode_plotter(freqs, vin, vout, corner_freq_text='Hz'):
-    plt.semilogx(freqs, (20 * np.log10(vout/vin)))
+@instrument('db')
+def gain_db(transfer, out=None):
+    "20 log10 |transfer| computed in one real buffer (out, if given)."
+    with np.errstate(divide='ignore'):
+        gain = np.abs(transfer, out=out)
+        np.log10(gain, out=gain)
+        gain *= 20
+    return gain
+
+@instrument('plot')
+def filter_bode_plotter(freqs, vin, vout, corner_freq_text='Hz', filename=None):
+    freqs, vin, vout = np.asarray(freqs), np.asarray(vin), np.asarray(vout)
+    if filename is not None: # headless, decimated, no display needed
+        corner = corner_freq_text if isinstance(corner_freq_text, (int, float)) else None
+        return render_bode(freqs, vout if vin.ndim == 0 and vin == 1 else vout / vin, filename,
+                           corner_freq=corner)
+    import matplotlib.pyplot as plt # deferred, importing the package stays plot-free
+    corner = corner_freq_text if isinstance(corner_freq_text, (int, float)) else None
+    grid = log_sweep(freqs[0], freqs[-1], sweep_accuracy, features=corner)
+    if freqs.size > grid.size: # thin dense (e.g. linspace) sweeps to the log grid
+        keep = np.unique(np.searchsorted(freqs, grid).clip(max=freqs.size - 1))
+        freqs = freqs[keep]
+        vin = vin[keep] if vin.ndim else vin
+        vout = vout[keep] if vout.ndim else vout
+    transfer = vout if vin.ndim == 0 and vin == 1 else vout / vin
+    plt.semilogx(freqs, gain_db(transfer))
     plt.grid(which='both')
     plt.xlabel("Frequency (Hz)")
     plt.ylabel("Gain (dB)")
     plt.title("Bode plot")
-    plt.text(0.1, 0.1, f"{corner_freq_text} Hz")
+    plt.text(freqs[0], 0.1, f"{corner_freq_text} Hz")
     plt.show()
 
 def user_input(args):
@@ -47,10 +143,8 @@ def user_input(args):
             output_impedance = parallel_res(res_one, np.abs(cap_imp(cap_one, rc_filter_freq_corner)))
             print(f"Freq corner: {rc_filter_freq_corner} Hz")
             print(f"Output impedance: {output_impedance} Ohms at {rc_filter_freq_corner} Hz")
-            freq_range = np.linspace(0.1, 10e6, num=10_000_000)
-            cap_one_imp = np.abs(cap_imp(cap_one, freq_range))
-            vin, vout = filter_signal(freq_range, res_one, cap_one_imp)
-            filter_bode_plotter(freq_range, vin, vout, rc_filter_freq_corner)
+            _, freq_range, response = filter_sweep("rc", res_one, cap_one)
+            filter_bode_plotter(freq_range, 1, response, rc_filter_freq_corner)
         case "lc":
             print("Low-pass LC filter")
             ind_one = float(input("ind: "))
@@ -60,11 +154,8 @@ def user_input(args):
                                             np.abs(cap_imp(cap_one, lc_filter_freq_corner)))
             print(f"Freq corner: {lc_filter_freq_corner} Hz")
             print(f"Output impedance: {output_impedance} Ohms at {lc_filter_freq_corner} Hz")
-            freq_range = np.linspace(0.1, 10e6, num=10_000_000)
-            ind_one_imp = np.abs(ind_imp(ind_one, freq_range))
-            cap_one_imp = np.abs(cap_imp(cap_one, freq_range))
-            vin, vout = filter_signal(freq_range, ind_one_imp, cap_one_imp)
-            filter_bode_plotter(freq_range, vin, vout, lc_filter_freq_corner)
+            _, freq_range, response = filter_sweep("lc", ind_one, cap_one)
+            filter_bode_plotter(freq_range, 1, response, lc_filter_freq_corner)
         case "cr":
             print("High-pass CR filter")
             cap_one = float(input("cap: "))
@@ -73,10 +164,8 @@ def user_input(args):
             output_impedance = parallel_res(np.abs(cap_imp(cap_one, cr_filter_freq_corner)), res_one)
             print(f"Freq corner: {cr_filter_freq_corner} Hz")
             print(f"Output impedance: {output_impedance} Ohms at {cr_filter_freq_corner} Hz")
-            freq_range = np.linspace(0.1, 10e6, num=10_000_000)
-            cap_one_imp = np.abs(cap_imp(cap_one, freq_range))
-            vin, vout = filter_signal(freq_range, cap_one_imp, res_one)
-            filter_bode_plotter(freq_range, vin, vout, cr_filter_freq_corner)
+            _, freq_range, response = filter_sweep("cr", cap_one, res_one)
+            filter_bode_plotter(freq_range, 1, response, cr_filter_freq_corner)
         case "cl":
             print("High-pass CL filter")
             cap_one = float(input("cap: "))
@@ -86,11 +175,8 @@ def user_input(args):
                                             np.abs(ind_imp(ind_one, cl_filter_freq_corner)))
             print(f"Freq corner: {cl_filter_freq_corner} Hz")
             print(f"Output impedance: {output_impedance} Ohms at {cl_filter_freq_corner} Hz")
-            freq_range = np.linspace(0.1, 10e6, num=10_000_000)
-            cap_one_imp = np.abs(cap_imp(cap_one, freq_range))
-            ind_one_imp = np.abs(ind_imp(ind_one, freq_range))
-            vin, vout = filter_signal(freq_range, cap_one_imp, ind_one_imp)
-            filter_bode_plotter(freq_range, vin, vout, cl_filter_freq_corner)
+            _, freq_range, response = filter_sweep("cl", cap_one, ind_one)
+            filter_bode_plotter(freq_range, 1, response, cl_filter_freq_corner)
 
         case "rl" | "lr":
             print("Why would you?")
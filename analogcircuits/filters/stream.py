@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# Streaming time-domain filtering through the passive filters, chunk by chunk
+
+import numpy as np
+
+def analog_coeffs(filter_type, comp_one, comp_two, res=0):
+    """
+    Returns the analog transfer function H(s) of a passive filter.
+
+    Component order follows `rc_filter`, `lc_filter`, `cr_filter` and
+    `cl_filter`.  The LC and CL filters take an optional series resistance,
+    without it (res=0) they are lossless and ring forever.
+
+    Parameters
+    ----------
+    filter_type : str
+        'rc', 'lc', 'cr' or 'cl'.
+
+    comp_one, comp_two : float or ndarray
+        Component values (Ohms, H, F) in the order of the filter's name,
+        arrays broadcast to a batch of designs.
+
+    res : float or ndarray
+        Series (source) resistance in Ohms for 'lc' and 'cl'.
+
+    Returns
+    -------
+    num, den : ndarray
+        Polynomial coefficients in s, highest power first, shape (..., 3).
+
+    """
+    match filter_type:
+        case "rc":
+            res, cap = comp_one, comp_two
+            num, den = [0, 0, 1], [0, res * cap, 1]
+        case "cr":
+            cap, res = comp_one, comp_two
+            num, den = [0, res * cap, 0], [0, res * cap, 1]
+        case "lc":
+            ind, cap = comp_one, comp_two
+            num, den = [0, 0, 1], [ind * cap, res * cap, 1]
+        case "cl":
+            cap, ind = comp_one, comp_two
+            num, den = [ind * cap, 0, 0], [ind * cap, res * cap, 1]
+        case _:
+            raise ValueError(f"Not a filter type: {filter_type}")
+    coeffs = np.stack(np.broadcast_arrays(*num, *den), axis=-1).astype(float)
+    return coeffs[..., :3], coeffs[..., 3:]
+
+def bilinear_coeffs(filter_type, comp_one, comp_two, sample_rate, res=0):
+    """
+    Discretizes a passive filter into a recursive (IIR) kernel.
+
+    Uses the bilinear transform prewarped at the filter's corner, so the
+    digital corner lands exactly on the analog one.
+
+    Parameters
+    ----------
+    filter_type : str
+        'rc', 'lc', 'cr' or 'cl'.
+
+    comp_one, comp_two : float
+        Component values in the order of the filter's name.
+
+    sample_rate : float
+        Sample rate in Hz, must be above twice the corner frequency.
+
+    res : float
+        Series resistance in Ohms for 'lc' and 'cl' (default 0).
+
+    Returns
+    -------
+    b, a : ndarray
+        Numerator and denominator in z^-1, a[0] == 1.
+
+    """
+    num, den = analog_coeffs(filter_type, comp_one, comp_two, res)
+    if den[0]: # second order, corner at 1 / sqrt(LC)
+        omega = 1 / np.sqrt(den[0])
+    else:
+        omega = 1 / den[1]
+    if omega >= np.pi * sample_rate:
+        raise ValueError("Corner frequency must be below the Nyquist frequency.")
+    k = omega / np.tan(omega / (2 * sample_rate)) # prewarped s = k (1 - z^-1) / (1 + z^-1)
+    if den[0]:
+        b = np.array([num[0] * k**2 + num[1] * k + num[2], 2 * (num[2] - num[0] * k**2),
+                      num[0] * k**2 - num[1] * k + num[2]])
+        a = np.array([den[0] * k**2 + den[1] * k + den[2], 2 * (den[2] - den[0] * k**2),
+                      den[0] * k**2 - den[1] * k + den[2]])
+    else:
+        b = np.array([num[1] * k + num[2], num[2] - num[1] * k])
+        a = np.array([den[1] * k + den[2], den[2] - den[1] * k])
+    return b / a[0], a / a[0]
+
+def iir_filter(samples, b, a, state=None):
+    """
+    Filters samples along axis 0, returning the state for the next chunk.
+
+    Uses scipy.signal.lfilter when scipy is installed, else a block-vectorized
+    NumPy solve.
+
+    Parameters
+    ----------
+    samples : ndarray
+        Shape (samples,) or (samples, channels).
+
+    b, a : ndarray
+        Kernel from `bilinear_coeffs`.
+
+    state : ndarray, optional
+        Filter state from the previous chunk, shape (order,) + channels
+        (default zeros, filter at rest).
+
+    Returns
+    -------
+    filtered : ndarray
+        Filtered samples, same shape as samples.
+
+    state : ndarray
+        Filter state after the last sample.
+
+    """
+    samples = np.asarray(samples)
+    order = len(a) - 1
+    if state is None:
+        state = np.zeros((order,) + samples.shape[1:], dtype=np.result_type(samples, b, a))
+    try:
+        from scipy.signal import lfilter
+    except ImportError:
+        return _lfilter(samples, b, a, state)
+    return lfilter(b, a, samples, axis=0, zi=state)
+
+def _lfilter(samples, b, a, state, block_size=256):
+    """
+    Helper, transposed direct form II without scipy, block-vectorized.
+
+    As a state space s' = A s + B u, y = C s + D u, a block of block_size
+    samples is T u + O s0 (T the Toeplitz matrix of the impulse response, O
+    the free response to the state), so all blocks filter in one matmul once
+    their starting states are known from a scan over blocks.
+    """
+    b, a = np.asarray(b) / a[0], np.asarray(a) / a[0]
+    order = len(a) - 1
+    b = np.concatenate((b, np.zeros(order + 1 - len(b))))
+    length = len(samples)
+    if order == 0 or length == 0:
+        return b[0] * samples.astype(state.dtype), state.copy()
+    dtype = state.dtype
+    mat_a = np.eye(order, k=1, dtype=dtype)
+    mat_a[:, 0] = -a[1:]
+    vec_b = (b[1:] - a[1:] * b[0]).astype(dtype)
+    powers = np.empty((block_size + 1, order, order), dtype=dtype) # A^j
+    powers[0] = np.eye(order)
+    for j in range(block_size):
+        powers[j + 1] = powers[j] @ mat_a
+    free = powers[:block_size, 0, :] # C A^j, rows of O
+    forced = powers[:block_size] @ vec_b # A^j B
+    lag = np.arange(block_size)[:, np.newaxis] - np.arange(block_size) - 1
+    toeplitz = np.where(lag >= 0, forced[np.clip(lag, 0, None), 0], 0) + b[0] * np.eye(block_size)
+    to_state = forced[::-1].T # column m: A^(L-1-m) B
+
+    blocks = -(-length // block_size)
+    channels = int(np.prod(samples.shape[1:], dtype=int))
+    inputs = np.zeros((blocks * block_size, channels), dtype=dtype)
+    inputs[:length] = samples.reshape(length, -1)
+    columns = inputs.reshape(blocks, block_size, channels).transpose(1, 0, 2).reshape(block_size, -1)
+    # block states s_k = A^L s_(k-1) + R u_(k-1), an associative scan in log2(blocks) steps
+    states = np.empty((blocks + 1, order, channels), dtype=dtype)
+    states[0] = state.reshape(order, -1)
+    states[1:] = (to_state @ columns).reshape(order, blocks, channels).transpose(1, 0, 2)
+    step, span = powers[block_size], 1
+    while span < blocks + 1:
+        states[span:] += step @ states[:-span]
+        step, span = step @ step, 2 * span
+    starts = states[:-1].transpose(1, 0, 2).reshape(order, -1)
+    filtered = toeplitz @ columns + free @ starts
+    filtered = filtered.reshape(block_size, blocks, channels).transpose(1, 0, 2).reshape(-1, *samples.shape[1:])
+    rest = length - (blocks - 1) * block_size # samples in the last block
+    current = powers[rest] @ states[-2] + forced[:rest][::-1].T @ inputs[length - rest:length]
+    return filtered[:length], current.reshape(state.shape)
+
+def stream_filter(chunks, b, a, state=None):
+    """
+    Filters an iterator of chunks, carrying the state across boundaries.
+
+    The output is identical to filtering the concatenated chunks at once,
+    while memory stays at one chunk.
+
+    Parameters
+    ----------
+    chunks : iterable of ndarray
+        Consecutive chunks, shape (samples,) or (samples, channels).
+
+    b, a : ndarray
+        Kernel from `bilinear_coeffs`.
+
+    state : ndarray, optional
+        Initial filter state (default zeros).
+
+    Yields
+    ------
+    filtered : ndarray
+        Filtered chunk.
+
+    """
+    for chunk in chunks:
+        filtered, state = iir_filter(chunk, b, a, state)
+        yield filtered
+
+def memmap_chunks(path, dtype=np.float32, chunk_size=2**20, channels=1, offset=0):
+    """
+    Yields consecutive chunks of a raw sample file through a memory map.
+
+    Parameters
+    ----------
+    path : str
+        Raw binary file of interleaved samples.
+
+    dtype : dtype
+        Sample type (default float32).
+
+    chunk_size : int
+        Samples (per channel) per chunk (default 2**20).
+
+    channels : int
+        Interleaved channels (default 1).
+
+    offset : int
+        Header bytes to skip (default 0).
+
+    Yields
+    ------
+    chunk : ndarray
+        Shape (samples,) for one channel, else (samples, channels).
+
+    """
+    samples = np.memmap(path, dtype=dtype, mode='r', offset=offset)
+    samples = samples[:samples.size - samples.size % channels]
+    if channels > 1:
+        samples = samples.reshape(-1, channels)
+    for start in range(0, samples.shape[0], chunk_size):
+        yield np.asarray(samples[start:start + chunk_size])
+
+def filter_file(in_path, out_path, b, a, dtype=np.float32, chunk_size=2**20, channels=1, offset=0):
+    """
+    Filters a raw sample file of any length into a new file in constant memory.
+
+    Parameters
+    ----------
+    in_path : str
+        Raw binary input, see `memmap_chunks`.
+
+    out_path : str
+        Raw binary output, same dtype and layout, header not copied.
+
+    b, a : ndarray
+        Kernel from `bilinear_coeffs`.
+
+    dtype, chunk_size, channels, offset
+        As for `memmap_chunks`.
+
+    Returns
+    -------
+    out_path : str
+        The written file.
+
+    """
+    with open(out_path, 'wb') as out_file:
+        for filtered in stream_filter(memmap_chunks(in_path, dtype, chunk_size, channels, offset), b, a):
+            out_file.write(filtered.astype(dtype, copy=False).tobytes())
+    return out_path
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Frequency grids for filter sweeps
+
+import numpy as np
+from analogcircuits.profiling import instrument
+
+@instrument('grid')
+def log_sweep(freq_start, freq_stop, accuracy=0.01, features=None):
+    """
+    Returns a log-spaced frequency grid, refined around corners and resonances.
+
+    The base grid steps by a ratio of (1 + accuracy) between points, which is
+    what a Bode plot on a log axis can resolve.  Around each feature frequency
+    points are added geometrically closer to the feature, down to a relative
+    offset of accuracy**2, so narrow resonance peaks (e.g. `lc_filter`) are
+    sampled without densifying the whole sweep.
+
+    Parameters
+    ----------
+    freq_start : float
+        Start frequency in Hz, must be > 0.
+
+    freq_stop : float
+        Stop frequency in Hz.
+
+    accuracy : float
+        Relative frequency step of the base grid (default 1 %).
+
+    features : float or array_like, optional
+        Corner or resonance frequencies in Hz to refine around.
+
+    Returns
+    -------
+    freqs : ndarray
+        Sorted, unique frequencies in Hz.
+
+    """
+    if freq_start <= 0 or freq_stop <= freq_start:
+        raise ValueError("Need 0 < freq_start < freq_stop.")
+    if not 0 < accuracy < 1:
+        raise ValueError("accuracy must be between 0 and 1.")
+
+    step = np.log10(1 + accuracy)
+    num = int(np.ceil(np.log10(freq_stop / freq_start) / step)) + 1
+    freqs = np.geomspace(freq_start, freq_stop, num=num)
+
+    if features is not None:
+        features = np.atleast_1d(np.asarray(features, dtype=float))
+        features = features[(features >= freq_start) & (features <= freq_stop)]
+        if features.size:
+            # offsets from accuracy**2 up to one base step, ~accuracy per point
+            offset_num = int(np.ceil(np.log10(accuracy) / -step)) + 1
+            offsets = np.geomspace(accuracy**2, accuracy, num=offset_num)
+            offsets = np.concatenate((-offsets[::-1], [0], offsets))
+            refined = (features[:, np.newaxis] * (1 + offsets)).ravel()
+            refined = refined[(refined >= freq_start) & (refined <= freq_stop)]
+            freqs = np.union1d(freqs, refined)
+
+    return freqs
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# Monte Carlo tolerance and yield analysis of the passive filters
+
+from functools import partial
+import numpy as np
+from analogcircuits.filters.passive import(rc_filter, lc_filter, cr_filter, cl_filter, rc_response,
+                                           lc_response, cr_response, cl_response, gain_db)
+from analogcircuits.profiling import instrument
+
+filter_funcs = {'rc': (rc_filter, rc_response), 'lc': (lc_filter, lc_response),
+                'cr': (cr_filter, cr_response), 'cl': (cl_filter, cl_response)}
+reference_temp = 25 # C, tolerances and tempcos are specified here
+
+def draw_components(rng, nominal, tolerance, size, distribution='uniform'):
+    """
+    Draws component values around a nominal value.
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+        Random stream.
+
+    nominal : float
+        Nominal value (Ohms, H, F).
+
+    tolerance : float
+        Relative tolerance, e.g. 0.01 for 1 %.
+
+    size : int
+        Number of values.
+
+    distribution : str
+        'uniform' over +-tolerance (default) or 'normal' with tolerance as 3 sigma.
+
+    Returns
+    -------
+    values : ndarray
+        Shape (size,).
+
+    """
+    match distribution:
+        case "uniform":
+            deviation = rng.uniform(-tolerance, tolerance, size)
+        case "normal":
+            deviation = rng.normal(0, tolerance / 3, size)
+        case _:
+            raise ValueError(f"Not a distribution: {distribution}")
+    return nominal * (1 + deviation)
+
+def _counts(values, edges):
+    "Helper, histogram with underflow and overflow bins, shape (..., edges + 1)."
+    index = np.searchsorted(edges, values, side='right')
+    flat = index.reshape(-1, index.shape[-1]) if index.ndim > 1 else index[np.newaxis]
+    counts = np.stack([np.bincount(row, minlength=edges.size + 1) for row in flat])
+    return counts.reshape(index.shape[:-1] + (edges.size + 1,))
+
+def _chunk(chunk, config):
+    "Helper, draws and reduces one chunk from its own seeded stream."
+    rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence(config['seed'], spawn_key=(chunk,))))
+    size = min(config['chunk_size'], config['trials'] - chunk * config['chunk_size'])
+    corner_func, response_func = filter_funcs[config['filter_type']]
+    temp = rng.uniform(*config['temp_range'], size) - reference_temp
+    comps = [draw_components(rng, nominal, tolerance, size, config['distribution']) * (1 + tempco * 1e-6 * temp)
+             for nominal, tolerance, tempco in zip(config['nominal'], config['tolerance'], config['tempco'])]
+    corner = corner_func(*comps)
+    passed = (corner >= config['corner_limits'][0]) & (corner <= config['corner_limits'][1])
+    stats = {'corner_counts': _counts(corner, config['corner_bins']), 'corner_sum': corner.sum(),
+             'corner_sumsq': (corner**2).sum()}
+    if config['freqs'].size:
+        gain = gain_db(response_func(comps[0][:, np.newaxis], comps[1][:, np.newaxis], config['freqs']))
+        passed &= np.all((gain >= config['lower_db']) & (gain <= config['upper_db']), axis=-1)
+        stats['gain_counts'] = _counts(gain.T, config['gain_bins'])
+    stats['passed'] = int(passed.sum())
+    return stats
+
+def _percentiles(counts, edges, percentiles):
+    "Helper, percentiles interpolated from histogram counts (..., edges + 1)."
+    cdf = np.cumsum(counts, axis=-1) / counts.sum(axis=-1, keepdims=True)
+    result = np.empty(counts.shape[:-1] + (len(percentiles),))
+    for idx in np.ndindex(counts.shape[:-1]):
+        # bins 1..edges-1 lie between edges; under/overflow clamp to the outer edges
+        result[idx] = np.interp(np.asarray(percentiles) / 100, cdf[idx][:-1], edges)
+    return result
+
+@instrument('tolerance')
+def monte_carlo(filter_type, comp_one, comp_two, tolerance_one=0.01, tolerance_two=0.05, trials=1_000_000,
+                seed=0, distribution='uniform', tempco_one=0, tempco_two=0, temp_range=(25, 25),
+                freqs=(), lower_db=-np.inf, upper_db=np.inf, corner_limits=(0, np.inf),
+                corner_bins=None, gain_bins=None, percentiles=(0.135, 2.275, 50, 97.725, 99.865),
+                chunk_size=2**16, workers=1):
+    """
+    Monte Carlo tolerance analysis and yield of a passive filter.
+
+    Component values are drawn chunk by chunk, each chunk from its own
+    stream seeded by np.random.SeedSequence(seed, spawn_key=(chunk,)), and
+    reduced to histograms and sums at once, so memory stays at one chunk
+    and results are bit-identical for a seed whatever the worker count.
+
+    Parameters
+    ----------
+    filter_type : str
+        'rc', 'lc', 'cr' or 'cl'.
+
+    comp_one, comp_two : float
+        Nominal component values in the order of the filter's name.
+
+    tolerance_one, tolerance_two : float
+        Relative tolerances (default 1 % and 5 %).
+
+    trials : int
+        Number of trials (default 1M).
+
+    seed : int
+        Seed of the random streams (default 0).
+
+    distribution : str
+        'uniform' (default) or 'normal', see `draw_components`.
+
+    tempco_one, tempco_two : float
+        Temperature coefficients in ppm/C (default 0).
+
+    temp_range : tuple of float
+        (min, max) ambient in C, drawn uniformly per trial (default 25 C).
+
+    freqs : array_like
+        Frequencies in Hz where the gain is checked (default none).
+
+    lower_db, upper_db : float or array_like
+        Spec mask, gain limits in dB at freqs.
+
+    corner_limits : tuple of float
+        (min, max) corner frequency in Hz for a pass.
+
+    corner_bins : array_like, optional
+        Corner histogram edges in Hz (default 1000 bins over +-4 times the
+        combined tolerance).
+
+    gain_bins : array_like, optional
+        Gain histogram edges in dB (default -80 dB to +20 dB in 0.05 dB).
+
+    percentiles : sequence of float
+        Percentiles to report (default -3, -2, 0, +2, +3 sigma).
+
+    chunk_size : int
+        Trials per chunk (default 65536), fixes the random streams.
+
+    workers : int
+        Processes (default 1, runs in this process).
+
+    Returns
+    -------
+    result : dict
+        'trials', 'passed', 'yield', 'corner_mean', 'corner_std',
+        'corner_bins', 'corner_counts' (with underflow first and overflow
+        last), 'corner_percentiles', and with freqs 'gain_bins',
+        'gain_counts' and 'gain_percentiles' of shape (freqs, ...).
+
+    """
+    if trials < 1 or chunk_size < 1:
+        raise ValueError("trials and chunk_size must be at least 1")
+    corner_func, _ = filter_funcs[filter_type]
+    nominal_corner = corner_func(comp_one, comp_two)
+    if corner_bins is None:
+        spread = 4 * (tolerance_one + tolerance_two + 1e-6 * (abs(tempco_one) + abs(tempco_two))
+                      * max(abs(temp - reference_temp) for temp in temp_range))
+        corner_bins = nominal_corner * np.linspace(1 - min(spread, 0.99), 1 + spread, 1001)
+    freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+    config = {'filter_type': filter_type, 'nominal': (comp_one, comp_two),
+              'tolerance': (tolerance_one, tolerance_two), 'tempco': (tempco_one, tempco_two),
+              'temp_range': temp_range, 'distribution': distribution, 'seed': seed, 'trials': trials,
+              'chunk_size': chunk_size, 'freqs': freqs,
+              'lower_db': np.broadcast_to(np.asarray(lower_db, dtype=float), freqs.shape),
+              'upper_db': np.broadcast_to(np.asarray(upper_db, dtype=float), freqs.shape),
+              'corner_limits': corner_limits, 'corner_bins': np.asarray(corner_bins, dtype=float),
+              'gain_bins': np.linspace(-80, 20, 2001) if gain_bins is None else np.asarray(gain_bins, dtype=float)}
+    chunks = range(-(-trials // chunk_size))
+    run = partial(_chunk, config=config)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(workers) as pool: # results come back in chunk order
+            totals = _reduce(pool.map(run, chunks, chunksize=max(1, len(chunks) // (4 * workers))))
+    else:
+        totals = _reduce(map(run, chunks))
+
+    mean = totals['corner_sum'] / trials
+    result = {'trials': trials, 'passed': totals['passed'], 'yield': totals['passed'] / trials,
+              'corner_mean': mean, 'corner_std': np.sqrt(max(totals['corner_sumsq'] / trials - mean**2, 0)),
+              'corner_bins': config['corner_bins'], 'corner_counts': totals['corner_counts'],
+              'corner_percentiles': _percentiles(totals['corner_counts'], config['corner_bins'], percentiles)}
+    if freqs.size:
+        result.update(gain_bins=config['gain_bins'], gain_counts=totals['gain_counts'],
+                      gain_percentiles=_percentiles(totals['gain_counts'], config['gain_bins'], percentiles))
+    return result
+
+def _reduce(chunk_stats):
+    "Helper, sums chunk stats in chunk order."
+    totals = None
+    for stats in chunk_stats:
+        if totals is None:
+            totals = stats
+        else:
+            for key, value in stats.items():
+                totals[key] = totals[key] + value
+    return totals
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# Analytic corners, resonances and phase margins of rational transfer functions
+
+import numpy as np
+from analogcircuits.profiling import instrument
+
+# Transfer functions are (num, den) coefficient arrays in s, highest power
+# first, as from `analog_coeffs`, the active stages or `cascade_coeffs`, and
+# evaluate with `stage_response`.  |H(jw)|^2 is a ratio of polynomials in
+# x = w^2, so corners and peaks are roots of polynomials in x instead of
+# crossings on a sampled grid.  Internally polynomials are ascending.
+
+half_power_db = 10 * np.log10(2) # 3.0103 dB
+
+def _pmul(poly_one, poly_two):
+    "Helper, product of ascending polynomials along the last axis."
+    shape = np.broadcast_shapes(poly_one.shape[:-1], poly_two.shape[:-1])
+    product = np.zeros(shape + (poly_one.shape[-1] + poly_two.shape[-1] - 1,))
+    for i in range(poly_one.shape[-1]):
+        product[..., i:i + poly_two.shape[-1]] += poly_one[..., i:i + 1] * poly_two
+    return product
+
+def _pval(poly, x):
+    "Helper, ascending polynomials (..., k) at points (..., r) by Horner."
+    value = poly[..., -1:]
+    for i in range(poly.shape[-1] - 2, -1, -1):
+        value = value * x + poly[..., i:i + 1]
+    return np.broadcast_to(value, np.broadcast_shapes(value.shape, np.shape(x)))
+
+def _magnitude(coeffs):
+    "Helper, |p(jw)|^2 ascending in x = w^2 from coefficients highest first."
+    poly = coeffs[..., ::-1]
+    even = _pmul(poly, poly * (-1.0)**np.arange(poly.shape[-1]))[..., ::2] # p(s) p(-s) in s^2 = -x
+    return even * (-1.0)**np.arange(even.shape[-1])
+
+def _degree(poly):
+    "Helper, degree of ascending polynomials, ignoring relatively tiny leading terms, 0 for zero."
+    nonzero = np.abs(poly) > 1e-12 * np.max(np.abs(poly), axis=-1, keepdims=True)
+    return np.where(nonzero.any(axis=-1), poly.shape[-1] - 1 - np.argmax(nonzero[..., ::-1], axis=-1), 0)
+
+def _positive_roots(poly):
+    """
+    Helper, positive real roots of ascending polynomials (designs, k), from
+    the eigenvalues of companion matrices batched by degree.  Returns shape
+    (designs, k - 1), ascending, nan padded.
+    """
+    roots = np.full((poly.shape[0], poly.shape[-1] - 1), np.nan)
+    degree = _degree(poly)
+    for deg in np.unique(degree[degree > 0]):
+        rows = np.flatnonzero(degree == deg)
+        companion = np.zeros((rows.size, deg, deg))
+        companion[:, np.arange(1, deg), np.arange(deg - 1)] = 1
+        companion[:, :, -1] = -poly[rows, :deg] / poly[rows, deg:deg + 1]
+        values = np.linalg.eigvals(companion)
+        real = (np.abs(values.imag) <= 1e-7 * np.abs(values)) & (values.real > 0)
+        roots[rows, :deg] = np.where(real, values.real, np.nan)
+    return np.sort(roots, axis=-1)
+
+def _prepare(num, den):
+    """
+    Helper, |N|^2 and |D|^2 in x / x_scale as (designs, k) with the batch
+    shape and x_scale, which puts the denominator's outer roots around 1.
+    """
+    num, den = np.asarray(num, dtype=float), np.asarray(den, dtype=float)
+    size = max(num.shape[-1], den.shape[-1], 2)
+    num, den = (np.concatenate((np.zeros(coeffs.shape[:-1] + (size - coeffs.shape[-1],)), coeffs), axis=-1)
+                for coeffs in (num, den))
+    shape = np.broadcast_shapes(num.shape[:-1], den.shape[:-1])
+    num_mag, den_mag = (_magnitude(np.broadcast_to(coeffs, shape + (size,)).reshape(-1, size))
+                        for coeffs in (num, den))
+    nonzero = den_mag != 0
+    low = np.argmax(nonzero, axis=-1)
+    high = size - 1 - np.argmax(nonzero[:, ::-1], axis=-1)
+    rows = np.arange(den_mag.shape[0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_scale = (den_mag[rows, low] / den_mag[rows, high]) ** (1 / (high - low))
+    x_scale = np.where(high > low, x_scale, 1.0)[:, np.newaxis]
+    powers = x_scale ** np.arange(size)
+    return num_mag * powers, den_mag * powers, shape, x_scale
+
+def _ends(num_mag, den_mag):
+    "Helper, |H|^2 at DC and its high-frequency limit, inf when it grows without bound."
+    high = _degree(den_mag)
+    rows = np.arange(den_mag.shape[0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        limit = np.where(_degree(num_mag) > high, np.inf, num_mag[rows, high] / den_mag[rows, high])
+        return num_mag[:, 0] / den_mag[:, 0], limit
+
+def _stationary(num_mag, den_mag, rtol=1e-6):
+    """
+    Helper, scaled x of the peaks of |H|^2 = A / B: roots of A' B - A B'
+    that are local maxima above both DC and the high-frequency limit.  The
+    slope of a flat (e.g. Butterworth) response is roundoff below its
+    leading term, whose roots would be spurious peaks at the passband gain.
+    """
+    slope = (_pmul(num_mag[:, 1:] * np.arange(1, num_mag.shape[-1]), den_mag)
+             - _pmul(num_mag, den_mag[:, 1:] * np.arange(1, den_mag.shape[-1])))
+    slope = np.where(np.abs(slope) > 1e-9 * np.max(np.abs(slope), axis=-1, keepdims=True), slope, 0)
+    roots = _positive_roots(slope)
+    dc, limit = _ends(num_mag, den_mag)
+    with np.errstate(divide='ignore', invalid='ignore'): # nan padding, lossless peaks
+        peaks, below, above = (_pval(num_mag, x) / _pval(den_mag, x)
+                               for x in (roots, roots * (1 - 1e-4), roots * (1 + 1e-4)))
+        keep = ((peaks > below) & (peaks > above) & (peaks > dc[:, np.newaxis] * (1 + rtol))
+                & (peaks > limit[:, np.newaxis] * (1 + rtol)))
+    return np.where(keep, roots, np.nan)
+
+def _peak_gain(num_mag, den_mag, x_peaks):
+    "Helper, largest |H| over DC, the local maxima and the high-frequency limit."
+    dc, limit = _ends(num_mag, den_mag)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        peaks = _pval(num_mag, x_peaks) / _pval(den_mag, x_peaks)
+    return np.sqrt(np.nanmax(np.column_stack((dc, limit, peaks)), axis=-1))
+
+def cascade_coeffs(stages):
+    """
+    Returns the transfer function of stages in cascade.
+
+    Parameters
+    ----------
+    stages : sequence of (num, den)
+        Stage coefficients highest power first, e.g. from `analog_coeffs`
+        or `filter_cascade`, broadcast against each other.
+
+    Returns
+    -------
+    num, den : ndarray
+        Product coefficients, highest power first, shape (..., order + 1).
+
+    """
+    num, den = np.ones(1), np.ones(1)
+    for stage_num, stage_den in stages:
+        num = _pmul(num[..., ::-1], np.asarray(stage_num, dtype=float)[..., ::-1])[..., ::-1]
+        den = _pmul(den[..., ::-1], np.asarray(stage_den, dtype=float)[..., ::-1])[..., ::-1]
+    leading = np.all(np.concatenate((num, den), axis=-1).reshape(-1, 2, num.shape[-1]) == 0, axis=(0, 1))
+    start = np.argmin(leading) if not leading.all() else leading.size - 1 # drop leading zero terms
+    return num[..., start:], den[..., start:]
+
+@instrument('analysis')
+def resonance_peaks(num, den):
+    """
+    Returns the resonance peaks of transfer functions.
+
+    Peaks are the local maxima of |H(jw)| at w > 0 that rise above both the
+    DC gain and the high-frequency limit, from the roots of d|H|^2/dw^2, so
+    they are exact whatever the frequency grid.  Maximally flat responses
+    have none.
+
+    Parameters
+    ----------
+    num, den : ndarray
+        Coefficients in s, highest power first, shape (..., n).
+
+    Returns
+    -------
+    freqs : ndarray
+        Peak frequencies in Hz, shape (..., peaks), ascending, nan padded.
+
+    gains : ndarray
+        |H| at the peaks in V/V, same shape.
+
+    """
+    num_mag, den_mag, shape, x_scale = _prepare(num, den)
+    x_peaks = _stationary(num_mag, den_mag)
+    with np.errstate(divide='ignore'): # lossless resonators peak at inf
+        gains = np.sqrt(_pval(num_mag, x_peaks) / _pval(den_mag, x_peaks))
+    freqs = np.sqrt(x_peaks * x_scale) / (2 * np.pi)
+    return freqs.reshape(shape + (-1,)), gains.reshape(shape + (-1,))
+
+@instrument('analysis')
+def corner_freqs(num, den, ref_gain=None, level_db=-half_power_db):
+    """
+    Returns the frequencies where |H| crosses level_db relative to ref_gain.
+
+    The analytic counterpart of `minus_3db_freqs`: solves
+    |N(jw)|^2 = g^2 |D(jw)|^2 as a polynomial in w^2.
+
+    Parameters
+    ----------
+    num, den : ndarray
+        Coefficients in s, highest power first, shape (..., n).
+
+    ref_gain : float or ndarray, optional
+        Passband gain in V/V (default: the peak magnitude of each response,
+        over DC, resonances and the high-frequency limit; no crossings
+        when that is infinite, e.g. a lossless LC).
+
+    level_db : float
+        Level relative to ref_gain in dB (default -3.0103, exactly half power).
+
+    Returns
+    -------
+    freqs : ndarray
+        Crossing frequencies in Hz, shape (..., n - 1), ascending, nan padded.
+
+    """
+    num_mag, den_mag, shape, x_scale = _prepare(num, den)
+    if ref_gain is None:
+        ref_gain = _peak_gain(num_mag, den_mag, _stationary(num_mag, den_mag))
+    else:
+        ref_gain = np.broadcast_to(np.asarray(ref_gain, dtype=float), shape).reshape(-1)
+    level = (ref_gain * 10**(level_db / 20))[:, np.newaxis]**2
+    with np.errstate(invalid='ignore'):
+        roots = _positive_roots(np.where(np.isfinite(level), num_mag - level * den_mag, 0))
+    freqs = np.sqrt(roots * x_scale) / (2 * np.pi)
+    return freqs.reshape(shape + (-1,))
+
+@instrument('analysis')
+def phase_margin(num, den):
+    """
+    Returns the unity-gain crossovers and phase margins of loop gains.
+
+    num / den is the open loop gain, e.g. the opamp's A(s) times the
+    feedback factor.  Crossovers solve |N(jw)|^2 = |D(jw)|^2 in w^2.
+
+    Parameters
+    ----------
+    num, den : ndarray
+        Loop gain coefficients in s, highest power first, shape (..., n).
+
+    Returns
+    -------
+    freqs : ndarray
+        Crossover frequencies in Hz, shape (..., n - 1), ascending, nan padded.
+
+    margins : ndarray
+        180 + phase of the loop gain at each crossover in degrees, wrapped
+        to [-180, 180).
+
+    """
+    num_mag, den_mag, shape, x_scale = _prepare(num, den)
+    omega = np.sqrt(_positive_roots(num_mag - den_mag) * x_scale)
+    num, den = (np.broadcast_to(np.asarray(coeffs, dtype=float), shape + np.shape(coeffs)[-1:])
+                .reshape(-1, np.shape(coeffs)[-1]) for coeffs in (num, den))
+    s = 1j * omega
+    with np.errstate(invalid='ignore'): # nan padding
+        loop = _pval(num[:, ::-1], s) / _pval(den[:, ::-1], s)
+    margins = (np.degrees(np.angle(loop)) + 360) % 360 - 180
+    return (omega / (2 * np.pi)).reshape(shape + (-1,)), margins.reshape(shape + (-1,))
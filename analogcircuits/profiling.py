@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# Opt-in per-stage timers, counters and array stats, exported as a dict or Chrome trace
+
+from contextlib import contextmanager
+import functools
+import json
+import os
+import threading
+import time
+import numpy as np
+
+_state = {'enabled': os.environ.get('ANALOGCIRCUITS_PROFILE', '0') != '0'}
+_lock = threading.Lock()
+_stages = {}
+_functions = {}
+_events = []
+max_events = 100_000 # trace events kept, stats keep counting beyond
+
+def _array_stats(result):
+    "Helper, element count and bytes of the arrays in a result."
+    if isinstance(result, np.ndarray):
+        return result.size, result.nbytes
+    if isinstance(result, (tuple, list)):
+        elements = nbytes = 0
+        for item in result:
+            if isinstance(item, np.ndarray):
+                elements += item.size
+                nbytes += item.nbytes
+        return elements, nbytes
+    return 0, 0
+
+def _record(table, name, seconds, elements, nbytes):
+    "Helper, adds one call to a stats table."
+    stats = table.get(name)
+    if stats is None:
+        stats = table[name] = {'calls': 0, 'seconds': 0.0, 'elements': 0, 'bytes': 0, 'max_elements': 0}
+    stats['calls'] += 1
+    stats['seconds'] += seconds
+    stats['elements'] += elements
+    stats['bytes'] += nbytes
+    stats['max_elements'] = max(stats['max_elements'], elements)
+
+def instrument(stage):
+    """
+    Decorator, times calls of a function under a stage name when profiling
+    is enabled and records the size of the arrays it returns.
+
+    Disabled, a call costs one dict lookup on top of the function.
+
+    Parameters
+    ----------
+    stage : str
+        Stage name, e.g. 'grid', 'impedance', 'divider', 'db', 'plot' or 'noise'.
+
+    Returns
+    -------
+    decorator : function
+
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            stop = time.perf_counter()
+            elements, nbytes = _array_stats(result)
+            with _lock:
+                _record(_stages, stage, stop - start, elements, nbytes)
+                _record(_functions, name, stop - start, elements, nbytes)
+                if len(_events) < max_events:
+                    _events.append({'name': name, 'cat': stage, 'ph': 'X', 'ts': start * 1e6,
+                                    'dur': (stop - start) * 1e6, 'pid': os.getpid(),
+                                    'tid': threading.get_ident(),
+                                    'args': {'elements': elements, 'bytes': nbytes}})
+            return result
+        return wrapper
+    return decorator
+
+def enable_profiling(enabled=True):
+    "Turns profiling on (or off) for the process, like ANALOGCIRCUITS_PROFILE=1."
+    _state['enabled'] = enabled
+
+def profiling_enabled():
+    "True while calls are being recorded."
+    return _state['enabled']
+
+def reset_profile():
+    "Clears the recorded stats and trace events."
+    with _lock:
+        _stages.clear()
+        _functions.clear()
+        _events.clear()
+
+def profile_stats():
+    """
+    Returns the recorded stats.
+
+    Returns
+    -------
+    stats : dict
+        'stages' and 'functions', each a dict of name to 'calls', 'seconds'
+        (inclusive of nested stages), 'elements' and 'bytes' (summed over
+        the returned arrays) and 'max_elements'.
+
+    """
+    with _lock:
+        return {'stages': {name: dict(stats) for name, stats in _stages.items()},
+                'functions': {name: dict(stats) for name, stats in _functions.items()}}
+
+def export_chrome_trace(filename):
+    """
+    Writes the recorded calls as a Chrome trace, for chrome://tracing or
+    Perfetto.
+
+    Parameters
+    ----------
+    filename : str
+        JSON file to write.
+
+    Returns
+    -------
+    filename : str
+        The written file.
+
+    """
+    with _lock:
+        trace = {'traceEvents': list(_events), 'displayTimeUnit': 'ms'}
+    with open(filename, 'w') as trace_file:
+        json.dump(trace, trace_file)
+    return filename
+
+@contextmanager
+def profile(reset=True, trace_file=None):
+    """
+    Context manager, records calls inside the block.
+
+    Parameters
+    ----------
+    reset : bool
+        Clear earlier records first (default True).
+
+    trace_file : str, optional
+        Chrome trace written on exit.
+
+    Yields
+    ------
+    profile_stats : function
+        Call it (inside or after the block) for the stats dict.
+
+    """
+    previous = _state['enabled']
+    if reset:
+        reset_profile()
+    _state['enabled'] = True
+    try:
+        yield profile_stats
+    finally:
+        _state['enabled'] = previous
+        if trace_file is not None:
+            export_chrome_trace(trace_file)
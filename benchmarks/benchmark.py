@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+""" AnalogCircuits Benchmarks
+
+    Times and records peak memory of the element functions, the passive
+    filter sweeps and the opamp catalog load-and-rank flow.  Each run is
+    appended to a JSON lines history; runs slower or bigger than the
+    median of the previous runs by more than the threshold are flagged.
+
+    Run from the repo root: python3 benchmarks/benchmark.py
+"""
+import argparse
+import builtins
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('MPLBACKEND', 'Agg') # plt.show() must not block
+os.environ.setdefault('ANALOGCIRCUITS_CACHE', '0') # time the computation, not the result cache
+import numpy as np
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+history_file = os.path.join(repo_dir, "benchmarks", "history.jsonl")
+catalog_csv = os.path.join(repo_dir, "doc", "analog-devices-operational-amplifiers.csv")
+
+def measure(func, repeat=3):
+    """ Best wall time over repeat runs and peak traced memory of one run.
+
+    Args:
+        func: callable without arguments
+        repeat: number of timed runs (default 3)
+
+    Returns:
+        result: dict of 'seconds' and 'peak_bytes'
+    """
+    tracemalloc.start()
+    func()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"seconds": min(times), "peak_bytes": peak_bytes}
+
+def user_input_bench(filter_type, values):
+    """ Runs passive.user_input without a terminal or display.
+
+    Args:
+        filter_type: 'rc', 'lc', 'cr' or 'cl'
+        values: answers to the input() prompts
+
+    Returns:
+        run: callable for `measure`
+    """
+    from analogcircuits.filters import passive
+
+    def run():
+        answers = iter(values)
+        original_input = builtins.input
+        builtins.input = lambda prompt='': next(answers)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                passive.user_input(filter_type)
+        finally:
+            builtins.input = original_input
+            import matplotlib.pyplot as plt
+            plt.close('all')
+    return run
+
+def catalog_bench(store_dir):
+    """ Loads the catalog store and ranks opamps for 500 source resistances.
+
+    Args:
+        store_dir: directory for the converted catalog
+
+    Returns:
+        run: callable for `measure`
+    """
+    from analogcircuits.amplifiers import open_catalog, rank_opamps
+    source_res = np.geomspace(10, 1e8, 500)
+
+    def run():
+        catalog = open_catalog(catalog_csv, store_dir)
+        rank_opamps(source_res, catalog, k=10)
+    return run
+
+def benchmarks(size, store_dir):
+    """ Named benchmarks, built lazily so unselected ones allocate nothing.
+
+    Args:
+        size: array length for the element benchmarks
+        store_dir: directory for the converted catalog
+
+    Returns:
+        benches: dict of name to a setup function returning the callable
+    """
+    from analogcircuits.elements import cap_imp, ind_imp, voltage_divider
+    from analogcircuits.filters import rc_response
+    freqs = functools.cache(lambda: np.geomspace(0.1, 10e6, size))
+    cap_imps = functools.cache(lambda: cap_imp(1e-6, freqs()))
+
+    def bench(func, *inputs):
+        "Helper, setup that builds the inputs, then times func on them."
+        return lambda: functools.partial(func, *(make() for make in inputs))
+    return {
+        "discrete.cap_imp": bench(lambda f: cap_imp(1e-6, f), freqs),
+        "discrete.ind_imp": bench(lambda f: ind_imp(1e-3, f), freqs),
+        "discrete.voltage_divider": bench(lambda z: voltage_divider(1.0, 1e3, z), cap_imps),
+        "passive.rc_response": bench(lambda f: rc_response(1e3, 1e-6, f), freqs),
+        "passive.rc_response.float32": bench(lambda f: rc_response(1e3, 1e-6, f, dtype=np.float32), freqs),
+        "passive.user_input.rc": lambda: user_input_bench("rc", ["1e3", "1e-6"]),
+        "passive.user_input.lc": lambda: user_input_bench("lc", ["1e-3", "1e-6"]),
+        "passive.user_input.cr": lambda: user_input_bench("cr", ["1e-6", "1e3"]),
+        "passive.user_input.cl": lambda: user_input_bench("cl", ["1e-6", "1e-3"]),
+        "catalog.load_and_rank": lambda: catalog_bench(store_dir),
+    }
+
+def platform_name():
+    "Machine the run is on, runs only compare with runs of the same one."
+    return f"{platform.system()}-{platform.machine()}-{platform.python_implementation()}"
+
+def read_history(path):
+    "Previous runs from the history file, oldest first."
+    if not os.path.exists(path):
+        return []
+    with open(path) as history:
+        return [json.loads(line) for line in history if line.strip()]
+
+def find_regressions(results, history, threshold, size, machine, window=5):
+    """ Compares results with the median of the last window matching runs.
+    Only runs with the same size and platform count as a baseline.
+
+    Args:
+        results: dict of name to {'seconds', 'peak_bytes'}
+        history: previous runs from `read_history`
+        threshold: allowed relative increase, e.g. 0.2 for 20 %
+        size: element array length of this run
+        machine: `platform_name` of this run
+        window: number of previous runs to take the median of
+
+    Returns:
+        regressions: list of (name, metric, value, baseline)
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = [run["results"][name] for run in history
+                    if name in run["results"] and run.get("size") == size
+                    and run.get("platform") == machine][-window:]
+        for metric, value in result.items():
+            if previous:
+                baseline = float(np.median([run[metric] for run in previous]))
+                if value > baseline * (1 + threshold):
+                    regressions.append((name, metric, value, baseline))
+    return regressions
+
+def git_commit():
+    "Current commit hash, None outside a git checkout."
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    my_parser = argparse.ArgumentParser(prog='benchmark', description='AnalogCircuits benchmarks')
+    my_parser.add_argument('--size', type=int, default=10_000_000, help='Element array length (10M)')
+    my_parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark (3)')
+    my_parser.add_argument('--threshold', type=float, default=0.2, help='Regression threshold (0.2 = 20 %%)')
+    my_parser.add_argument('--history', type=str, default=history_file, help='JSON lines history file')
+    my_parser.add_argument('--only', type=str, default='', help='Run benchmarks whose name contains this')
+    my_parser.add_argument('--no-save', action='store_true', help='Do not append this run to the history')
+    my_parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 when regressions are flagged')
+    args = my_parser.parse_args()
+
+    sys.path.insert(0, repo_dir)
+    with tempfile.TemporaryDirectory() as store_dir:
+        results = {}
+        for name, setup in benchmarks(args.size, os.path.join(store_dir, "catalog")).items():
+            if args.only in name:
+                results[name] = measure(setup(), args.repeat)
+                print(f"{name:28s} {results[name]['seconds'] * 1e3:10.3f} ms "
+                      f"{results[name]['peak_bytes'] / 2**20:10.2f} MiB")
+
+    machine = platform_name()
+    regressions = find_regressions(results, read_history(args.history), args.threshold, args.size, machine)
+    for name, metric, value, baseline in regressions:
+        print(f"REGRESSION {name} {metric}: {value:.4g} vs median {baseline:.4g}")
+
+    if not args.no_save:
+        run = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(),
+               "platform": machine, "python": platform.python_version(), "numpy": np.__version__,
+               "size": args.size, "results": results}
+        with open(args.history, 'a') as history:
+            history.write(json.dumps(run) + "\n")
+        print(f"Saved {args.history}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
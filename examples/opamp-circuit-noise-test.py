@@ -1,4 +1,5 @@
 import numpy as np
+from analogcircuits.constants import boltzmann, room_temp
 
 def inverting_opamp_gain(feedback_res, g_res):
     "Simple helper function."
@@ -10,11 +11,9 @@ def parallel_res(res_one, res_two):
     parallel_res = (res_one * res_two) / (res_one + res_two)
     return parallel_res
 
-def resistor_thermal_noise(res):
+def resistor_thermal_noise(res, temp=room_temp):
     "Johnson-Nyquist noise, aka thermal noise"
-    k = 1.38e-23 # J/K, Boltzmann constant
-    temp = 289 # K, room temperature
-    thermal_noise = np.sqrt(4 * k * temp * res)
+    thermal_noise = np.sqrt(4 * boltzmann * temp * res)
     return thermal_noise
 
 def noise_gain(feedback_res, res_g):
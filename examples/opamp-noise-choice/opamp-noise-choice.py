@@ -9,55 +9,9 @@
 """
 import argparse
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
-
-def resistor_vnoise(res, bandwidth=1):
-    """ Calculates Johnson-Nyquist noise (thermal noise) of resistors.
-    Default temp is room temp, 20 C.  
-
-    Args:
-        res: resistor value in Ohms
-        bandwidth: bandwidth in Hz (default 1)
-    
-    Returns:
-        vnoise: voltage noise of resistor in V/sqrt(Hz)
-    """
-    k = 1.38e-23 # J/K, Boltzmann constant J/K
-    room_temp = 293.15 # K, 20 C
-    vnoise = np.sqrt(4 * k * room_temp * bandwidth * res)
-    return vnoise
-
-def resistor_inoise(res, bandwidth=1):
-    """ Calculates the Johnson-Nyquist current noise of resistor.
-    Default temp is room temp, 20 C.
-    
-    Args:
-        res: resistor in Ohms
-        bandwidth: bandwidth in Hz
-    
-    Returns:
-        inoise: current noise in A/sqrt(Hz)
-    """
-    k = 1.38e-23 # J/K, Boltzmann constant J/K
-    room_temp = 293.15 # K, 20 C
-    inoise = np.sqrt((4 * k * room_temp * bandwidth) / res)
-    return inoise
-
-def opamp_Rs_op(vnoise_opamp, inoise_opamp):
-    """ Opamp equvilant resistance based on its voltage and current noise.  
-    Helper function.  Based on Analog Devices AN-940.
-    
-    Args:
-        vnoise_opamp: opamp's voltage noise in V/sqrt(Hz), usually at 1 kHz
-        inoise_opamp: opamp's current noise in A/sqrt(Hz), usually at 1 kHz
-    
-    Return:
-        Rs_op: resistance in Ohms, based on vnoise/inoise of opamp
-    """
-    Rs_op = vnoise_opamp / inoise_opamp
-    return Rs_op
+from analogcircuits.amplifiers import (open_catalog, resistor_vnoise, opamp_Rs_op, rank_opamps)
 
 if __name__ == "__main__":
     np.seterr(divide='ignore')
@@ -76,9 +30,9 @@ if __name__ == "__main__":
     source_resistance_range_vnoise = resistor_vnoise(source_resistance_range, bw_low)
     plt.loglog(source_resistance_range, source_resistance_range_vnoise, label="Johnson Noise")
 
-    analog_devices_opamps = pd.read_csv("./data/ADIParametricSearch/Custom Data Format.csv")
-    analog_devices_opamp_vnoise = analog_devices_opamps['VNoise Density (typ) V/rtHz'].to_numpy()
-    analog_devices_opamp_inoise = analog_devices_opamps['Current Noise Density (typ)'].to_numpy()
+    analog_devices_opamps = open_catalog("./data/ADIParametricSearch/Custom Data Format.csv") # converted once, then memory-mapped
+    analog_devices_opamp_vnoise = analog_devices_opamps['VNoise Density (typ)']
+    analog_devices_opamp_inoise = analog_devices_opamps['Current Noise Density (typ)']
     analog_devices_opamp_Rs_op = opamp_Rs_op(analog_devices_opamp_vnoise, analog_devices_opamp_inoise)
     plt.loglog(analog_devices_opamp_Rs_op, analog_devices_opamp_vnoise, '.', label="Opamps")
     plt.hlines(source_resistance_noise, xmin=source_resistance, xmax=4e8, linestyles="dashed", label="source_resistance")  # source reference
@@ -92,14 +46,16 @@ if __name__ == "__main__":
     # plt.loglog(np.flip(source_range), -np.log(np.flip(source_vnoise_range) / np.flip(source_range)), '--', label="decade")
 
     # for labeling the opamps which are lower noise than source resistance
-    ideal_opamps = np.array([])
-    for i, opamp_rs_noise in enumerate(analog_devices_opamp_vnoise):
-        if opamp_rs_noise < source_resistance_noise:
-            plt.annotate(analog_devices_opamps['Part Number'][i], (analog_devices_opamp_Rs_op[i], analog_devices_opamp_vnoise[i]))
-            ideal_opamps = np.append(ideal_opamps, analog_devices_opamps['Part Number'][i])
-        else:
-            pass
-    
+    ideal = analog_devices_opamp_vnoise < source_resistance_noise
+    ideal_opamps = analog_devices_opamps['Part Number'][ideal]
+    for part, rs_op, vnoise in zip(ideal_opamps, analog_devices_opamp_Rs_op[ideal], analog_devices_opamp_vnoise[ideal]):
+        plt.annotate(part, (rs_op, vnoise))
+
+    top_index, top_noise = rank_opamps(source_resistance, analog_devices_opamps, k=5)
+    print(f"Lowest total noise opamps for source resistance {source_resistance} Ohms:")
+    for part, noise in zip(analog_devices_opamps['Part Number'][top_index[0]], top_noise[0]):
+        print(f"{part}: {noise} V/sqrt(Hz)")
+
     print(f"Ideal opamps for source resistance {source_resistance} Ohms:")
     print(type(ideal_opamps))
     np.savetxt("ideal-opamps.txt", ideal_opamps, delimiter = ",", fmt='%s')
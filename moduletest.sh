@@ -7,6 +7,10 @@ source .venv/bin/activate
 pip3 install numpy
 pip3 install matplotlib
 pip3 install -e .
+# Import-time regression: a plain import must not pull in plotting/pandas
+python3 -c "import sys, analogcircuits; analogcircuits.rc_filter; analogcircuits.rank_opamps; \
+heavy = [m for m in ('matplotlib', 'pandas') if m in sys.modules]; \
+assert not heavy, f'imported at import time: {heavy}'" && echo "Import test passed."
 # pip3 freeze
 # python3
 # import analogcircuits
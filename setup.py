@@ -5,5 +5,8 @@ setup(name='analogcircuits', version='0.1', packages=[
       'analogcircuits.elements',
       'analogcircuits.filters',
       'analogcircuits.amplifiers'
-      ]
+      ],
+      entry_points={'console_scripts': [
+      'analogcircuits-catalog-server = analogcircuits.amplifiers.server:main'
+      ]}
 )
\ No newline at end of file